@@ -1,21 +1,54 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
 import os
+import logging
+import logging.handlers
+import queue
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from services import task_decomposer, agent_launcher, agent_orchestrator, calendar, revision_tracker, client_intake, discovery_analysis, opportunity_scoring, sales_funnel, contract_builder, client_approval, close_summary, retrospective, reengagement, filesystem, workflow_template, meeting_notes, deal_risk_detector, follow_up_reminder, project_management, context_controller
-from routes import model_routes
 
-# Load environment variables
+# Load environment variables before importing the services, some of which
+# read configuration at import time
 load_dotenv()
 
+from services import task_decomposer, agent_launcher, agent_orchestrator, calendar, revision_tracker, client_intake, discovery_analysis, opportunity_scoring, sales_funnel, contract_builder, client_approval, close_summary, retrospective, reengagement, filesystem, workflow_template, meeting_notes, deal_risk_detector, follow_up_reminder, project_management, context_controller
+from routes import model_routes
+
 app = FastAPI(
     title="IntelliSync CMS - MCP API",
     description="Model Context Protocol API for IntelliSync CMS",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Route log records through a queue so request handlers never block on
+# stream I/O; the listener thread performs the actual writes
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(
+    log_queue, logging.StreamHandler(), respect_handler_level=True
+)
+
+@app.on_event("startup")
+async def start_log_listener():
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    log_listener.start()
+
+# Blocking filesystem calls are run with asyncio.to_thread; size the default
+# executor so a burst of uploads does not queue behind a few slow calls
+@app.on_event("startup")
+async def configure_default_executor():
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=64))
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    log_listener.stop()
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -94,6 +94,9 @@ class ModelConfig:
         "memory_manager": ModelTier.STANDARD,
         "context_controller": ModelTier.ADVANCED,
         
+        # Short, low-temperature context reasoning that a small model handles well
+        "context_controller_small": ModelTier.BASIC,
+        
         # Default fallback
         "default": ModelTier.STANDARD
     }
@@ -2,9 +2,10 @@
 Model Manager for handling AI model access and execution.
 """
 
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import Dict, Any, List, Optional, Tuple, Union, AsyncIterator
 import logging
 import json
+import asyncio
 from datetime import datetime
 from .registry import ModelRegistry
 from .config import ModelType
@@ -41,7 +42,8 @@ class ModelManager:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
-        tool_choice: Optional[str] = None
+        tool_choice: Optional[str] = None,
+        user: Optional[str] = None
     ) -> Tuple[Dict[str, Any], ModelUsage]:
         """
         Generate text using a chat model.
@@ -53,6 +55,8 @@ class ModelManager:
             max_tokens: Maximum tokens to generate
             tools: List of tools the model can use
             tool_choice: How the model chooses to use tools
+            user: Stable end-user identifier, which helps the provider route
+                requests from the same user to warm prompt caches
             
         Returns:
             Tuple of (response data, usage statistics)
@@ -82,7 +86,8 @@ class ModelManager:
             temperature=actual_temp,
             max_tokens=actual_max_tokens,
             tools=tools,
-            tool_choice=tool_choice
+            tool_choice=tool_choice,
+            user=user
         )
         
         # Log usage
@@ -96,6 +101,92 @@ class ModelManager:
         
         return response, usage
     
+    async def generate_text_batch(
+        self,
+        service_name: str,
+        messages_list: List[List[Dict[str, Any]]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> List[Union[Tuple[Dict[str, Any], ModelUsage], Exception]]:
+        """
+        Generate text for several independent conversations at once.
+        
+        The requests run concurrently, bounded by the OpenAI client's
+        process-wide request limit (OPENAI_MAX_CONCURRENCY, 8 by default),
+        so a batch of N costs about N / 8 sequential round trips instead of N.
+        A completion that fails is returned as its exception rather than
+        failing the whole batch.
+        
+        Args:
+            service_name: Name of the service making the request
+            messages_list: One list of chat messages per completion
+            temperature: Temperature parameter (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate per completion
+            
+        Returns:
+            List of (response data, usage statistics) or the exception raised,
+            in input order
+        """
+        return await asyncio.gather(*(
+            self.generate_text(
+                service_name=service_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            for messages in messages_list
+        ), return_exceptions=True)
+    
+    async def stream_text(
+        self,
+        service_name: str,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        user: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream text from a chat model as it is generated.
+        
+        Streamed responses carry no usage data, so they are not recorded
+        in the usage history.
+        
+        Args:
+            service_name: Name of the service making the request
+            messages: List of messages for the chat
+            temperature: Temperature parameter (0.0 to 1.0)
+            max_tokens: Maximum tokens to generate
+            user: Stable end-user identifier sent to the provider
+            
+        Yields:
+            str: Content fragments in generation order
+        """
+        # Get appropriate model for this service
+        model = self.registry.get_model_for_service(service_name, ModelType.OPENAI_CHAT)
+        
+        # Get default parameters for this model
+        default_params = self.registry.get_default_parameters(model)
+        
+        # Use provided parameters or defaults
+        actual_temp = temperature if temperature is not None else default_params.get("default_temp", 0.7)
+        actual_max_tokens = max_tokens if max_tokens is not None else default_params.get("default_max_tokens", 2000)
+        
+        # Get OpenAI client
+        openai_client = self.registry.get_openai_client()
+        if not openai_client:
+            raise ValueError("OpenAI client not available")
+        
+        logger.info(f"Streaming text with model {model} for service {service_name}")
+        
+        async for delta in openai_client.stream_chat_completion(
+            messages=messages,
+            model=model,
+            temperature=actual_temp,
+            max_tokens=actual_max_tokens,
+            user=user
+        ):
+            yield delta
+    
     async def generate_embeddings(
         self,
         service_name: str,
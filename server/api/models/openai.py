@@ -5,7 +5,7 @@ This module provides a wrapper around the OpenAI API client,
 handling authentication, rate limiting, and usage tracking.
 """
 
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, List, Optional, Union, Tuple, AsyncIterator
 import os
 import logging
 from datetime import datetime
@@ -17,6 +17,43 @@ from pydantic import BaseModel
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Process-wide limits shared by every OpenAIClient instance, so traffic
+# spikes queue locally instead of tripping provider rate limits
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+MAX_CONNECTIONS = 32
+# Fail fast when the API host is unreachable, independent of the read timeout
+CONNECT_TIMEOUT_SECONDS = 2.0
+
+_request_semaphore: Optional[asyncio.Semaphore] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+def get_request_semaphore() -> asyncio.Semaphore:
+    """Return the shared request limiter, sized from OPENAI_MAX_CONCURRENCY on first use."""
+    global _request_semaphore
+    if _request_semaphore is None:
+        _request_semaphore = asyncio.Semaphore(
+            int(os.getenv("OPENAI_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENT_REQUESTS)))
+        )
+    return _request_semaphore
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared, connection-limited HTTP client for OpenAI requests."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        # HTTP/2 multiplexes concurrent requests over the kept-alive connections
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client, e.g. on application shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 class ModelUsage(BaseModel):
     """Track model usage and costs."""
     
@@ -86,7 +123,7 @@ class OpenAIClient:
         
         self.organization = organization or os.getenv("OPENAI_ORGANIZATION")
         self.base_url = base_url or "https://api.openai.com/v1"
-        self.timeout = timeout
+        self.timeout = httpx.Timeout(timeout, connect=CONNECT_TIMEOUT_SECONDS)
         self.max_retries = max_retries
         
         self.usage_log: List[ModelUsage] = []
@@ -105,7 +142,8 @@ class OpenAIClient:
         presence_penalty: float = 0.0,
         tools: Optional[List[Dict[str, Any]]] = None,
         tool_choice: Optional[str] = None,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, str]] = None,
+        user: Optional[str] = None
     ) -> Tuple[Dict[str, Any], ModelUsage]:
         """
         Create a chat completion.
@@ -121,6 +159,7 @@ class OpenAIClient:
             tools: List of tools the model can use
             tool_choice: How the model chooses to use tools
             response_format: Format to return the response in
+            user: Stable end-user identifier sent to the provider
             
         Returns:
             Tuple of (response data, usage statistics)
@@ -147,6 +186,9 @@ class OpenAIClient:
             
         if response_format:
             payload["response_format"] = response_format
+            
+        if user:
+            payload["user"] = user
         
         headers = self._get_headers()
         
@@ -157,6 +199,69 @@ class OpenAIClient:
         
         return response_data, usage
     
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        user: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+        
+        Streamed requests are not retried, since a partial response may
+        already have been forwarded to the caller.
+        
+        Args:
+            messages: List of message objects
+            model: Model to use
+            temperature: Sampling temperature
+            max_tokens: Maximum number of tokens to generate
+            user: Stable end-user identifier sent to the provider
+            
+        Yields:
+            str: Content fragments in generation order
+        """
+        endpoint = f"{self.base_url}/chat/completions"
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True
+        }
+        
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        
+        if user:
+            payload["user"] = user
+        
+        headers = self._get_headers()
+        
+        async with get_request_semaphore():
+            async with get_http_client().stream(
+                "POST", endpoint, headers=headers, json=payload, timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    error_body = await response.aread()
+                    raise Exception(f"OpenAI API error: {error_body.decode('utf-8', errors='replace')}")
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    
+                    choices = json.loads(data).get("choices") or []
+                    if choices:
+                        content = choices[0].get("delta", {}).get("content")
+                        if content:
+                            yield content
+    
     async def embeddings(
         self,
         input_text: Union[str, List[str]],
@@ -232,19 +337,19 @@ class OpenAIClient:
         
         headers = self._get_headers(content_type=None)  # Let httpx set for multipart
         
-        # Use httpx directly for form data
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                endpoint,
-                headers=headers,
-                files={"file": open(audio_file_path, "rb")},
-                data={"model": model, "language": language} if language else {"model": model}
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API error: {response.text}")
-            
-            response_data = response.json()
+        # Post the form data on the shared client, reusing its connections
+        response = await get_http_client().post(
+            endpoint,
+            headers=headers,
+            files={"file": open(audio_file_path, "rb")},
+            data={"model": model, "language": language} if language else {"model": model},
+            timeout=self.timeout
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"OpenAI API error: {response.text}")
+        
+        response_data = response.json()
         
         # Estimate usage (OpenAI doesn't provide usage stats for audio)
         # This is a rough estimate based on audio duration
@@ -283,29 +388,32 @@ class OpenAIClient:
         
         while attempts < self.max_retries:
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.request(
+                # Hold a concurrency slot only for the request itself, so
+                # waiting out a rate limit does not block other callers
+                async with get_request_semaphore():
+                    response = await get_http_client().request(
                         method,
                         url,
                         headers=headers,
-                        json=data
+                        json=data,
+                        timeout=self.timeout
                     )
-                    
-                    if response.status_code == 200:
-                        return response.json()
-                    
-                    # Handle rate limiting
-                    if response.status_code == 429:
-                        retry_after = int(response.headers.get("retry-after", "1"))
-                        logger.warning(f"Rate limited. Retrying after {retry_after} seconds.")
-                        await asyncio.sleep(retry_after)
-                        attempts += 1
-                        continue
-                    
-                    # Handle other errors
-                    error_data = response.json()
-                    error_message = error_data.get("error", {}).get("message", "Unknown OpenAI API error")
-                    raise Exception(f"OpenAI API error: {error_message}")
+                
+                if response.status_code == 200:
+                    return response.json()
+                
+                # Handle rate limiting
+                if response.status_code == 429:
+                    retry_after = float(response.headers.get("retry-after", "1"))
+                    logger.warning(f"Rate limited. Retrying after {retry_after} seconds.")
+                    await asyncio.sleep(retry_after)
+                    attempts += 1
+                    continue
+                
+                # Handle other errors
+                error_data = response.json()
+                error_message = error_data.get("error", {}).get("message", "Unknown OpenAI API error")
+                raise Exception(f"OpenAI API error: {error_message}")
                 
             except Exception as e:
                 last_error = e
@@ -4,6 +4,7 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
+import base64
 import os
 import logging
 from supabase import create_client
@@ -74,6 +75,19 @@ class EventCreate(BaseModel):
     recurrence: Optional[RecurrenceRule] = None
     metadata: Dict[str, Any] = {}
 
+def _attendee_rows(attendees: List[Attendee], event_id: str) -> List[Dict[str, Any]]:
+    """Builds the event_attendees insert rows for an event."""
+    return [
+        {
+            "id": attendee.id,
+            "email": attendee.email,
+            "role": attendee.role,
+            "response_status": attendee.response_status,
+            "event_id": event_id
+        }
+        for attendee in attendees
+    ]
+
 @router.post("/events")
 async def create_event(event: EventCreate):
     """
@@ -85,8 +99,8 @@ async def create_event(event: EventCreate):
         supabase_key = os.environ.get("SUPABASE_KEY")
         supabase = create_client(supabase_url, supabase_key)
         
-        # Generate a unique event ID
-        event_id = f"event-{uuid.uuid4().hex[:8]}"
+        # Generate a unique event ID from the full 128-bit UUID
+        event_id = "event-" + base64.b32encode(uuid.uuid4().bytes).decode("ascii").rstrip("=").lower()
         
         # Prepare event data for storage
         event_data = {
@@ -117,15 +131,7 @@ async def create_event(event: EventCreate):
             }
         
         # Process attendees
-        attendees_data = []
-        for attendee in event.attendees:
-            attendees_data.append({
-                "id": attendee.id,
-                "email": attendee.email,
-                "role": attendee.role,
-                "response_status": attendee.response_status,
-                "event_id": event_id
-            })
+        attendees_data = _attendee_rows(event.attendees, event_id)
         
         # Store event in database
         supabase.table("calendar_events").insert(event_data).execute()
@@ -213,9 +219,9 @@ async def delete_event(event_id: str):
         
         # Check if event exists
         event_response = supabase.table("calendar_events")\
-            .select("*")\
+            .select("id")\
             .eq("id", event_id)\
-            .single()\
+            .limit(1)\
             .execute()
             
         if not event_response.data:
@@ -258,16 +264,6 @@ async def update_event(event_id: str, event: EventCreate):
         supabase_key = os.environ.get("SUPABASE_KEY")
         supabase = create_client(supabase_url, supabase_key)
         
-        # Check if event exists
-        event_response = supabase.table("calendar_events")\
-            .select("*")\
-            .eq("id", event_id)\
-            .single()\
-            .execute()
-            
-        if not event_response.data:
-            raise HTTPException(status_code=404, detail="Event not found")
-        
         # Prepare event data for update
         event_data = {
             "type": event.type,
@@ -293,11 +289,14 @@ async def update_event(event_id: str, event: EventCreate):
                 "count": event.recurrence.count
             }
         
-        # Update event in database
-        supabase.table("calendar_events")\
+        # Update event in database; an empty result means the event does not exist
+        update_response = supabase.table("calendar_events")\
             .update(event_data)\
             .eq("id", event_id)\
             .execute()
+            
+        if not update_response.data:
+            raise HTTPException(status_code=404, detail="Event not found")
         
         # Process attendees - first delete existing attendees
         supabase.table("event_attendees")\
@@ -306,15 +305,7 @@ async def update_event(event_id: str, event: EventCreate):
             .execute()
         
         # Then add new attendees
-        attendees_data = []
-        for attendee in event.attendees:
-            attendees_data.append({
-                "id": attendee.id,
-                "email": attendee.email,
-                "role": attendee.role,
-                "response_status": attendee.response_status,
-                "event_id": event_id
-            })
+        attendees_data = _attendee_rows(event.attendees, event_id)
         
         if attendees_data:
             supabase.table("event_attendees").insert(attendees_data).execute()
@@ -348,9 +339,9 @@ async def get_event_attendees(event_id: str):
         
         # Check if event exists
         event_response = supabase.table("calendar_events")\
-            .select("*")\
+            .select("id, title")\
             .eq("id", event_id)\
-            .single()\
+            .limit(1)\
             .execute()
             
         if not event_response.data:
@@ -369,7 +360,7 @@ async def get_event_attendees(event_id: str):
         
         return {
             "event_id": event_id,
-            "event_title": event_response.data.get("title"),
+            "event_title": event_response.data[0].get("title"),
             "attendees": attendees
         }
     except HTTPException as he:
@@ -393,20 +384,6 @@ async def reschedule_event(
         supabase_key = os.environ.get("SUPABASE_KEY")
         supabase = create_client(supabase_url, supabase_key)
         
-        # Check if event exists
-        event_response = supabase.table("calendar_events")\
-            .select("*")\
-            .eq("id", event_id)\
-            .single()\
-            .execute()
-            
-        if not event_response.data:
-            raise HTTPException(status_code=404, detail="Event not found")
-        
-        event_data = event_response.data
-        old_start_time = event_data.get("start_time")
-        old_end_time = event_data.get("end_time")
-        
         # Validate new times
         if new_start_time >= new_end_time:
             raise HTTPException(
@@ -414,26 +391,22 @@ async def reschedule_event(
                 detail="New start time must be before new end time"
             )
         
-        # Update event with new times
-        update_data = {
-            "start_time": new_start_time.isoformat(),
-            "end_time": new_end_time.isoformat(),
-            "status": EventStatus.RESCHEDULED,
-            "updated_at": datetime.now().isoformat(),
-            "rescheduling_history": event_data.get("rescheduling_history", []) + [{
-                "old_start_time": old_start_time,
-                "old_end_time": old_end_time,
-                "new_start_time": new_start_time.isoformat(),
-                "new_end_time": new_end_time.isoformat(),
-                "rescheduled_at": datetime.now().isoformat()
-            }]
-        }
+        rescheduled_at = datetime.now().isoformat()
         
-        # Update the event in database
-        supabase.table("calendar_events")\
-            .update(update_data)\
-            .eq("id", event_id)\
-            .execute()
+        # Update times and append to rescheduling_history in a single atomic
+        # statement; an empty result means the event does not exist
+        reschedule_response = supabase.rpc("reschedule_calendar_event", {
+            "p_event_id": event_id,
+            "p_new_start_time": new_start_time.isoformat(),
+            "p_new_end_time": new_end_time.isoformat(),
+            "p_rescheduled_at": rescheduled_at
+        }).execute()
+        
+        if not reschedule_response.data:
+            raise HTTPException(status_code=404, detail="Event not found")
+        
+        old_start_time = reschedule_response.data[0].get("old_start_time")
+        old_end_time = reschedule_response.data[0].get("old_end_time")
         
         # Log event rescheduling
         logger.info(f"Rescheduled event {event_id} from {old_start_time} to {new_start_time.isoformat()}")
@@ -449,7 +422,7 @@ async def reschedule_event(
             "old_end_time": old_end_time,
             "new_start_time": new_start_time.isoformat(),
             "new_end_time": new_end_time.isoformat(),
-            "rescheduled_at": datetime.now().isoformat()
+            "rescheduled_at": rescheduled_at
         }
     except HTTPException as he:
         raise he
@@ -1,17 +1,41 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-from datetime import datetime
-import uuid
+from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from collections import defaultdict
 import logging
-import os
 import json
 from supabase import create_client
-from openai import OpenAIClient
+from ..models.openai import OpenAIClient
+from ..utils.llm_cache import cached_completion
+from ..utils.database import init_pool, close_pool, get_pool
+from ..utils.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/intake", tags=["client-intake"])
+router = APIRouter(prefix="/intake", tags=["client-intake"], default_response_class=ORJSONResponse)
+
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Returns the shared Supabase client, creating it on first use."""
+    settings = get_settings()
+    return create_client(settings.supabase_url, settings.supabase_key)
+
+@router.on_event("startup")
+def prime_supabase():
+    try:
+        get_supabase()
+    except Exception as e:
+        logger.warning(f"Deferred Supabase client creation: {str(e)}")
+
+@router.on_event("startup")
+async def open_db_pool():
+    await init_pool()
+
+@router.on_event("shutdown")
+async def close_db_pool():
+    await close_pool()
 
 class IntakeSession(BaseModel):
     client_id: str
@@ -22,43 +46,45 @@ class IntakeResponse(BaseModel):
     status: str
     summary: Optional[str] = None
 
-@router.post("/start")
+# Questions that must be answered before an intake session is completed
+REQUIRED_QUESTIONS = frozenset({"company_name", "contact_name", "project_type", "budget_range"})
+REQUIRED_QUESTION_KEYS = sorted(REQUIRED_QUESTIONS)
+
+START_INTAKE_QUERY = """
+    INSERT INTO intake_sessions (session_id, client_id, responses, status, created_at, updated_at)
+    SELECT 'intake-' || replace(gen_random_uuid()::text, '-', ''), $1, $2::jsonb, 'in_progress', now(), now()
+    WHERE EXISTS (SELECT 1 FROM clients WHERE id = $1)
+    RETURNING session_id
+"""
+
+UPDATE_INTAKE_QUERY = """
+    UPDATE intake_sessions
+    SET responses = COALESCE(responses, '{}'::jsonb) || $1::jsonb,
+        updated_at = now(),
+        status = CASE
+            WHEN (COALESCE(responses, '{}'::jsonb) || $1::jsonb) ?& $2::text[] THEN 'completed'
+            ELSE status
+        END
+    WHERE session_id = $3
+    RETURNING status
+"""
+
+@router.post("/start", response_model_exclude_none=True)
 async def start_intake(session: IntakeSession) -> IntakeResponse:
     try:
         # Validate input
         if not session.client_id:
             raise HTTPException(status_code=400, detail="Client ID is required")
         
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Check if client exists
-        client_response = supabase.table("clients")\
-            .select("id")\
-            .eq("id", session.client_id)\
-            .execute()
+        # Create the session only if the client exists, in a single statement;
+        # no returned row means the client was not found
+        session_id = await get_pool().fetchval(
+            START_INTAKE_QUERY, session.client_id, session.responses
+        )
             
-        if not client_response.data:
+        if not session_id:
             raise HTTPException(status_code=404, detail="Client not found")
         
-        # Generate a unique session ID
-        session_id = f"intake-{uuid.uuid4().hex[:8]}"
-        
-        # Create a new intake session
-        session_data = {
-            "session_id": session_id,
-            "client_id": session.client_id,
-            "responses": session.responses,
-            "status": "in_progress",
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        # Store the session in Supabase
-        supabase.table("intake_sessions").insert(session_data).execute()
-        
         # Log the session creation
         logger.info(f"Created intake session {session_id} for client {session.client_id}")
         
@@ -72,56 +98,24 @@ async def start_intake(session: IntakeSession) -> IntakeResponse:
         logger.error(f"Failed to create intake session: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/update/{session_id}")
+@router.post("/update/{session_id}", response_model_exclude_none=True)
 async def update_intake(session_id: str, responses: Dict[str, Any]) -> IntakeResponse:
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Check if session exists
-        session_response = supabase.table("intake_sessions")\
-            .select("*")\
-            .eq("session_id", session_id)\
-            .single()\
-            .execute()
+        # Merge the new responses into the stored ones and mark the session
+        # completed once all required questions are answered, in one statement
+        status = await get_pool().fetchval(
+            UPDATE_INTAKE_QUERY, responses, REQUIRED_QUESTION_KEYS, session_id
+        )
             
-        if not session_response.data:
+        if status is None:
             raise HTTPException(status_code=404, detail="Intake session not found")
             
-        # Get the existing session data
-        existing_session = session_response.data
-        existing_responses = existing_session.get("responses", {})
-        
-        # Merge the existing responses with the new ones
-        merged_responses = {**existing_responses, **responses}
-        
-        # Update the session with the new responses
-        update_data = {
-            "responses": merged_responses,
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        # If all required questions are answered, update status to completed
-        required_questions = ["company_name", "contact_name", "project_type", "budget_range"]
-        all_required_answered = all(q in merged_responses for q in required_questions)
-        
-        if all_required_answered:
-            update_data["status"] = "completed"
-        
-        # Update the session in Supabase
-        supabase.table("intake_sessions")\
-            .update(update_data)\
-            .eq("session_id", session_id)\
-            .execute()
-            
         # Log the session update
         logger.info(f"Updated intake session {session_id} with new responses")
         
         return IntakeResponse(
             session_id=session_id,
-            status=update_data.get("status", existing_session.get("status", "in_progress"))
+            status=status
         )
     except HTTPException as he:
         raise he
@@ -129,13 +123,81 @@ async def update_intake(session_id: str, responses: Dict[str, Any]) -> IntakeRes
         logger.error(f"Failed to update intake session {session_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{client_id}")
-async def get_intake_summary(client_id: str) -> IntakeResponse:
+# Fields that make an intake worth summarizing with the LLM, and how many
+# of them must be answered before it is called
+SUMMARY_FIELDS = ("company_name", "contact_name", "project_type", "budget_range", "timeline", "goals")
+MIN_SUMMARY_FIELDS = 4
+
+INTAKE_FIELD_LABELS = {
+    "company_name": "Company",
+    "contact_name": "Contact",
+    "project_type": "Project Type",
+    "budget_range": "Budget Range",
+    "timeline": "Timeline",
+    "goals": "Goals",
+    "challenges": "Challenges",
+    "previous_experience": "Previous Experience"
+}
+
+INTAKE_SUMMARY_PROMPT = """Generate a concise summary of the following client intake information:
+
+Company: {company_name}
+Contact: {contact_name}
+Project Type: {project_type}
+Budget Range: {budget_range}
+Timeline: {timeline}
+Goals: {goals}
+Challenges: {challenges}
+Previous Experience: {previous_experience}
+
+Format the summary as a concise paragraph that highlights the key points about the client and their needs.
+"""
+
+def _template_summary(responses: Dict[str, Any]) -> str:
+    """Builds a summary for sparse intakes without calling the LLM."""
+    provided = [f"{label}: {responses[field]}" for field, label in INTAKE_FIELD_LABELS.items() if responses.get(field)]
+    missing = [label for field, label in INTAKE_FIELD_LABELS.items() if field in SUMMARY_FIELDS and not responses.get(field)]
+    details = "; ".join(provided) if provided else "no details provided yet"
+    return f"Intake is incomplete ({details}). More information is needed on: {', '.join(missing)}."
+
+async def _stream_summary(openai_client: OpenAIClient, messages: List[Dict[str, Any]], chunks: List[str]):
+    """Forwards summary tokens from OpenAI while collecting them into `chunks`."""
+    async for delta in openai_client.stream_chat_completion(
+        model="gpt-4o-mini",
+        messages=messages,
+        max_tokens=300,
+        temperature=0.7
+    ):
+        chunks.append(delta)
+        yield delta
+
+def _store_summary(session_id: str, summary: str) -> None:
+    """Persists a generated summary on its intake session."""
+    try:
+        get_supabase().table("intake_sessions")\
+            .update({"summary": summary})\
+            .eq("session_id", session_id)\
+            .execute()
+    except Exception as e:
+        logger.error(f"Failed to store summary for intake session {session_id}: {str(e)}")
+
+def _store_streamed_summary(session_id: str, chunks: List[str]) -> None:
+    """Persists a streamed summary after the response has been sent."""
+    summary = "".join(chunks).strip()
+    if not summary:
+        logger.warning(f"No summary generated for intake session {session_id}")
+        return
+    _store_summary(session_id, summary)
+
+@router.get("/{client_id}", response_model_exclude_none=True)
+async def get_intake_summary(
+    client_id: str,
+    background_tasks: BackgroundTasks,
+    stream: bool = False
+) -> IntakeResponse:
     try:
         # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
+        supabase = get_supabase()
         
         # Get the most recent completed intake session for this client
         session_response = supabase.table("intake_sessions")\
@@ -152,37 +214,60 @@ async def get_intake_summary(client_id: str) -> IntakeResponse:
         session_data = session_response.data[0]
         responses = session_data.get("responses", {})
         
+        # Too little information for a useful AI summary; answer with a
+        # deterministic one instead of calling OpenAI
+        present_fields = sum(1 for field in SUMMARY_FIELDS if responses.get(field))
+        if present_fields < MIN_SUMMARY_FIELDS:
+            summary = _template_summary(responses)
+            if stream:
+                return StreamingResponse(
+                    iter([summary]),
+                    media_type="text/plain; charset=utf-8",
+                    headers={
+                        "X-Intake-Session-Id": str(session_data.get("session_id")),
+                        "X-Intake-Status": "needs_more_info"
+                    }
+                )
+            return IntakeResponse(
+                session_id=session_data.get("session_id"),
+                status="needs_more_info",
+                summary=summary
+            )
+        
         # Generate a summary using OpenAI
         openai_client = OpenAIClient()
         
-        prompt = f"""Generate a concise summary of the following client intake information:
+        # Unanswered questions render as "Not provided"
+        prompt = INTAKE_SUMMARY_PROMPT.format_map(defaultdict(lambda: "Not provided", responses))
         
-        Company: {responses.get('company_name', 'Not provided')}
-        Contact: {responses.get('contact_name', 'Not provided')}
-        Project Type: {responses.get('project_type', 'Not provided')}
-        Budget Range: {responses.get('budget_range', 'Not provided')}
-        Timeline: {responses.get('timeline', 'Not provided')}
-        Goals: {responses.get('goals', 'Not provided')}
-        Challenges: {responses.get('challenges', 'Not provided')}
-        Previous Experience: {responses.get('previous_experience', 'Not provided')}
+        messages = [{"role": "user", "content": prompt}]
         
-        Format the summary as a concise paragraph that highlights the key points about the client and their needs.
-        """
+        # Stream tokens to the caller as they arrive; the summary is stored
+        # once the stream has been fully sent
+        if stream:
+            chunks: List[str] = []
+            background_tasks.add_task(_store_streamed_summary, session_data.get("session_id"), chunks)
+            return StreamingResponse(
+                _stream_summary(openai_client, messages, chunks),
+                media_type="text/plain; charset=utf-8",
+                headers={
+                    "X-Intake-Session-Id": str(session_data.get("session_id")),
+                    "X-Intake-Status": str(session_data.get("status"))
+                }
+            )
         
-        summary_response = await openai_client.chat_completion(
+        summary_response, _ = await cached_completion(
+            openai_client.chat_completion,
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             max_tokens=300,
             temperature=0.7
         )
         
-        summary = summary_response.choices[0].message.content.strip()
+        summary = summary_response["choices"][0]["message"]["content"].strip()
         
-        # Update the session with the generated summary
-        supabase.table("intake_sessions")\
-            .update({"summary": summary})\
-            .eq("session_id", session_data.get("session_id"))\
-            .execute()
+        # Store the summary after the response has been sent
+        background_tasks.add_task(_store_summary, session_data.get("session_id"), summary)
             
         return IntakeResponse(
             session_id=session_data.get("session_id"),
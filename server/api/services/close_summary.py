@@ -1,10 +1,47 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+from functools import lru_cache
+import uuid
+import asyncio
+import logging
+import math
+import re
+import orjson
+import numpy as np
+from supabase import create_client
+from ..models.openai import OpenAIClient
+from ..utils.llm_cache import cached_completion
+from ..utils.database import init_pool, close_pool, get_pool
+from ..utils.settings import get_settings
 
-router = APIRouter(prefix="/close-summary", tags=["close-summary"])
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/close-summary", tags=["close-summary"], default_response_class=ORJSONResponse)
+
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Returns the shared Supabase client, creating it on first use."""
+    settings = get_settings()
+    return create_client(settings.supabase_url, settings.supabase_key)
+
+@router.on_event("startup")
+def prime_supabase():
+    try:
+        get_supabase()
+    except Exception as e:
+        logger.warning(f"Deferred Supabase client creation: {str(e)}")
+
+@router.on_event("startup")
+async def open_db_pool():
+    await init_pool()
+
+@router.on_event("shutdown")
+async def close_db_pool():
+    await close_pool()
 
 class ProjectStatus(str, Enum):
     COMPLETED = "completed"
@@ -67,8 +104,43 @@ class SummaryResponse(BaseModel):
     generated_at: datetime
     content: Dict[str, Any]
 
-@router.post("/summarize", response_model=SummaryResponse)
-async def generate_close_summary(request: SummaryRequest):
+# Project row plus its deliverables and metrics, serialized the same way
+# PostgREST returns them
+PROJECT_CLOSE_DATA_QUERY = """
+    SELECT
+        to_json(p) AS project,
+        COALESCE((SELECT json_agg(d) FROM deliverables d WHERE d.project_id = p.id), '[]'::json) AS deliverables,
+        COALESCE((SELECT json_agg(m) FROM project_metrics m WHERE m.project_id = p.id), '[]'::json) AS metrics
+    FROM projects p
+    WHERE p.id = $1
+"""
+
+LESSONS_LEARNED_PROMPT = """Generate lessons learned for the following project:
+Project Name: {name}
+Description: {description}
+Status: {status}
+Close Reason: {close_reason}
+
+Format the response as a JSON array with the following structure for each lesson:
+[{{
+    "category": "<category>",  // One of: process, technical, communication, resource, client
+    "description": "<description>",
+    "impact": "<impact>",
+    "recommendation": "<recommendation>"
+}}]
+"""
+
+NEXT_STEPS_PROMPT = """Based on the following project closure information, recommend 3-5 next steps:
+Project Name: {name}
+Status: {status}
+Close Reason: {close_reason}
+Additional Notes: {additional_notes}
+
+Format the response as a JSON array of strings.
+"""
+
+@router.post("/summarize", response_model=SummaryResponse, response_model_exclude_none=True)
+async def generate_close_summary(request: SummaryRequest, background_tasks: BackgroundTasks):
     """
     Generate a close-out summary for a completed project.
     """
@@ -76,85 +148,51 @@ async def generate_close_summary(request: SummaryRequest):
         # Initialize OpenAI client for AI-driven summary generation
         openai_client = OpenAIClient()
         
-        # Fetch project data from database
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Fetch project details
-        project_response = supabase.table("projects")\
-            .select("*, client_id, start_date, name, description")\
-            .eq("id", request.project_id)\
-            .single()\
-            .execute()
+        # Fetch the project with its deliverables and metrics in one round-trip
+        project_data = await get_pool().fetchrow(PROJECT_CLOSE_DATA_QUERY, request.project_id)
             
-        if not project_response.data:
+        if not project_data:
             raise HTTPException(status_code=404, detail="Project not found")
             
-        project = project_response.data
+        project = project_data["project"]
+        deliverables = project_data["deliverables"]
+        metrics = project_data["metrics"]
         
-        # Fetch deliverables
-        deliverables_response = supabase.table("deliverables")\
-            .select("*")\
-            .eq("project_id", request.project_id)\
-            .execute()
-            
-        deliverables = deliverables_response.data or []
-        
-        # Fetch metrics
-        metrics_response = supabase.table("project_metrics")\
-            .select("*")\
-            .eq("project_id", request.project_id)\
-            .execute()
-            
-        metrics = metrics_response.data or []
-        
-        # Generate AI-driven lessons learned
-        prompt = f"""Generate lessons learned for the following project:
-        Project Name: {project.get('name')}
-        Description: {project.get('description')}
-        Status: {request.status}
-        Close Reason: {request.close_reason}
-        
-        Format the response as a JSON array with the following structure for each lesson:
-        [{{
-            "category": "<category>",  // One of: process, technical, communication, resource, client
-            "description": "<description>",
-            "impact": "<impact>",
-            "recommendation": "<recommendation>"
-        }}]
-        """
+        # Generate AI-driven lessons learned and next steps recommendations
+        prompt_fields = {
+            "name": project.get('name'),
+            "description": project.get('description'),
+            "status": request.status.value,
+            "close_reason": request.close_reason.value,
+            "additional_notes": request.additional_notes or 'None provided'
+        }
+        prompt = LESSONS_LEARNED_PROMPT.format_map(prompt_fields)
+        next_steps_prompt = NEXT_STEPS_PROMPT.format_map(prompt_fields)
         
-        lessons_response = await openai_client.chat_completion(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000,
-            temperature=0.7
+        # The two generations are independent, so run them concurrently
+        (lessons_response, _), (next_steps_response, _) = await asyncio.gather(
+            cached_completion(
+                openai_client.chat_completion,
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1000,
+                temperature=0.7
+            ),
+            cached_completion(
+                openai_client.chat_completion,
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": next_steps_prompt}],
+                max_tokens=500,
+                temperature=0.7
+            )
         )
         
         # Parse the lessons learned from the AI response
-        lessons_text = lessons_response.choices[0].message.content
+        lessons_text = lessons_response["choices"][0]["message"]["content"]
         lessons_learned = parse_lessons_learned(lessons_text)
         
-        # Generate next steps recommendations
-        next_steps_prompt = f"""Based on the following project closure information, recommend 3-5 next steps:
-        Project Name: {project.get('name')}
-        Status: {request.status}
-        Close Reason: {request.close_reason}
-        Additional Notes: {request.additional_notes or 'None provided'}
-        
-        Format the response as a JSON array of strings.
-        """
-        
-        next_steps_response = await openai_client.chat_completion(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": next_steps_prompt}],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
         # Parse the next steps from the AI response
-        next_steps_text = next_steps_response.choices[0].message.content
+        next_steps_text = next_steps_response["choices"][0]["message"]["content"]
         next_steps = parse_next_steps(next_steps_text)
         
         # Create the summary content
@@ -177,25 +215,28 @@ async def generate_close_summary(request: SummaryRequest):
         
         # Generate a unique summary ID
         summary_id = f"summary-{uuid.uuid4().hex[:8]}"
+        generated_at = datetime.now(timezone.utc)
         
         # Store the summary in the database
         summary_data = {
             "summary_id": summary_id,
             "project_id": request.project_id,
             "client_id": request.client_id,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": generated_at.isoformat(),
             "status": request.status,
             "close_reason": request.close_reason,
             "content": summary_content
         }
         
-        supabase.table("project_summaries").insert(summary_data).execute()
+        # Persist after the response has been sent; the caller already gets
+        # the full summary content
+        background_tasks.add_task(store_project_summary, summary_data)
         
         return SummaryResponse(
             summary_id=summary_id,
             project_id=request.project_id,
             client_id=request.client_id,
-            generated_at=datetime.now(),
+            generated_at=generated_at,
             content=summary_content
         )
         
@@ -205,16 +246,25 @@ async def generate_close_summary(request: SummaryRequest):
         logger.error(f"Summary generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate summary: {str(e)}")
 
+def store_project_summary(summary_data: Dict[str, Any]) -> None:
+    """Insert a generated summary into project_summaries"""
+    try:
+        get_supabase().table("project_summaries").insert(summary_data).execute()
+    except Exception as e:
+        logger.error(f"Failed to store summary {summary_data.get('summary_id')}: {str(e)}")
+
+# Outermost JSON array in an LLM response (first "[" to last "]")
+JSON_ARRAY_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+
 def parse_lessons_learned(lessons_text: str) -> List[Dict[str, str]]:
     """Parse lessons learned from AI-generated text"""
     try:
         # Extract JSON array from the text if needed
-        if "[" in lessons_text and "]" in lessons_text:
-            start_idx = lessons_text.find("[")
-            end_idx = lessons_text.rfind("]") + 1
-            lessons_text = lessons_text[start_idx:end_idx]
+        match = JSON_ARRAY_PATTERN.search(lessons_text)
+        if match:
+            lessons_text = match.group(0)
             
-        lessons = json.loads(lessons_text)
+        lessons = orjson.loads(lessons_text)
         return lessons
     except Exception as e:
         logger.error(f"Failed to parse lessons learned: {str(e)}")
@@ -231,12 +281,11 @@ def parse_next_steps(next_steps_text: str) -> List[str]:
     """Parse next steps from AI-generated text"""
     try:
         # Extract JSON array from the text if needed
-        if "[" in next_steps_text and "]" in next_steps_text:
-            start_idx = next_steps_text.find("[")
-            end_idx = next_steps_text.rfind("]") + 1
-            next_steps_text = next_steps_text[start_idx:end_idx]
+        match = JSON_ARRAY_PATTERN.search(next_steps_text)
+        if match:
+            next_steps_text = match.group(0)
             
-        next_steps = json.loads(next_steps_text)
+        next_steps = orjson.loads(next_steps_text)
         return next_steps
     except Exception as e:
         logger.error(f"Failed to parse next steps: {str(e)}")
@@ -246,56 +295,45 @@ def parse_next_steps(next_steps_text: str) -> List[str]:
             "Consider opportunities for continued engagement"
         ]
 
+def pluralize(count: int, unit: str) -> str:
+    """Format a count with its unit, e.g. 1 month or 3 days"""
+    return f"{count} {unit}{'' if count == 1 else 's'}"
+
 def calculate_duration(start_date_str: str, end_date: datetime) -> str:
     """Calculate project duration in months and days"""
     try:
-        start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00'))
-        delta = end_date - start_date
-        
-        months = delta.days // 30
-        days = delta.days % 30
-        
-        if months > 0 and days > 0:
-            return f"{months} month{'s' if months > 1 else ''} and {days} day{'s' if days > 1 else ''}"
-        elif months > 0:
-            return f"{months} month{'s' if months > 1 else ''}"
-        else:
-            return f"{delta.days} day{'s' if delta.days > 1 else ''}"
+        # fromisoformat accepts the trailing "Z" Postgres emits (Python 3.11+)
+        delta = end_date - datetime.fromisoformat(start_date_str)
     except Exception as e:
         logger.error(f"Failed to calculate duration: {str(e)}")
         return "Unknown duration"
+    
+    months, days = divmod(delta.days, 30)
+    
+    if months > 0 and days > 0:
+        return f"{pluralize(months, 'month')} and {pluralize(days, 'day')}"
+    if months > 0:
+        return pluralize(months, "month")
+    return pluralize(delta.days, "day")
+
+DELIVERABLE_FIELDS = ("id", "name", "status", "delivery_date", "acceptance_date", "notes")
 
 def format_deliverables(deliverables: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Format deliverables for the summary"""
-    formatted = []
-    for d in deliverables:
-        formatted.append({
-            "id": d.get("id"),
-            "name": d.get("name"),
-            "status": d.get("status"),
-            "delivery_date": d.get("delivery_date"),
-            "acceptance_date": d.get("acceptance_date"),
-            "notes": d.get("notes")
-        })
-    return formatted
+    return [{field: d.get(field) for field in DELIVERABLE_FIELDS} for d in deliverables]
 
 def format_metrics(metrics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Format metrics for the summary"""
-    formatted = []
-    for m in metrics:
-        # Determine score based on target and actual values
-        target = m.get("target")
-        actual = m.get("actual")
-        score = determine_metric_score(target, actual)
-        
-        formatted.append({
+    return [
+        {
             "name": m.get("name"),
-            "target": target,
-            "actual": actual,
+            "target": m.get("target"),
+            "actual": m.get("actual"),
             "score": score,
             "notes": m.get("notes")
-        })
-    return formatted
+        }
+        for m, score in zip(metrics, determine_metric_scores(metrics))
+    ]
 
 def determine_metric_score(target: str, actual: str) -> str:
     """Determine metric score based on target and actual values"""
@@ -317,75 +355,79 @@ def determine_metric_score(target: str, actual: str) -> str:
         # If conversion fails, default to MET
         return MetricScore.MET
 
-@router.get("/{summary_id}", response_model=SummaryResponse)
+# Below this many metrics the per-row path is cheaper than building arrays
+VECTORIZE_METRICS_THRESHOLD = 50
+
+METRIC_SCORE_LEVELS = (MetricScore.EXCEEDED, MetricScore.MET, MetricScore.PARTIALLY_MET, MetricScore.NOT_MET)
+
+def parse_metric_value(value: str) -> float:
+    """Parse a metric value such as "85%" or "4/5", returning NaN if it is not numeric"""
+    try:
+        return float(value.replace('%', '').replace('/5', ''))
+    except Exception:
+        return math.nan
+
+def determine_metric_scores(metrics: List[Dict[str, Any]]) -> List[str]:
+    """Determine scores for a list of metrics, vectorized with NumPy for large lists"""
+    if len(metrics) < VECTORIZE_METRICS_THRESHOLD:
+        return [determine_metric_score(m.get("target"), m.get("actual")) for m in metrics]
+    
+    targets = np.fromiter((parse_metric_value(m.get("target")) for m in metrics), dtype=np.float64, count=len(metrics))
+    actuals = np.fromiter((parse_metric_value(m.get("actual")) for m in metrics), dtype=np.float64, count=len(metrics))
+    
+    levels = np.select(
+        [actuals >= targets * 1.1, actuals >= targets, actuals >= targets * 0.8],
+        [0, 1, 2],
+        default=3
+    )
+    # Values that cannot be compared default to MET, as in determine_metric_score
+    levels = np.where(np.isnan(targets) | np.isnan(actuals), 1, levels)
+    
+    return [METRIC_SCORE_LEVELS[level] for level in levels]
+
+# Summary reads share one column list and fixed SQL text, so each statement
+# is prepared once per pooled connection and reused from its cache
+SUMMARY_COLUMNS = "summary_id, project_id, client_id, generated_at, content"
+SUMMARY_BY_ID_QUERY = f"SELECT {SUMMARY_COLUMNS} FROM project_summaries WHERE summary_id = $1"
+LATEST_PROJECT_SUMMARY_QUERY = (
+    f"SELECT {SUMMARY_COLUMNS} FROM project_summaries WHERE project_id = $1 "
+    "ORDER BY generated_at DESC LIMIT 1"
+)
+
+@router.get("/{summary_id}", response_model=SummaryResponse, response_model_exclude_none=True)
 async def get_summary(summary_id: str):
     """
     Retrieve an existing close-out summary.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Query the database for the summary
-        response = supabase.table("project_summaries")\
-            .select("*")\
-            .eq("summary_id", summary_id)\
-            .single()\
-            .execute()
+        summary_data = await get_pool().fetchrow(SUMMARY_BY_ID_QUERY, summary_id)
             
-        if not response.data:
+        if not summary_data:
             raise HTTPException(status_code=404, detail="Summary not found")
-            
-        summary_data = response.data
         
         # Convert the stored data to the response model
-        return SummaryResponse(
-            summary_id=summary_data["summary_id"],
-            project_id=summary_data["project_id"],
-            client_id=summary_data["client_id"],
-            generated_at=datetime.fromisoformat(summary_data["generated_at"].replace('Z', '+00:00')),
-            content=summary_data["content"]
-        )
+        return SummaryResponse(**dict(summary_data))
     except HTTPException as he:
         raise he
     except Exception as e:
         logger.error(f"Failed to retrieve summary {summary_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/project/{project_id}", response_model=SummaryResponse)
+@router.get("/project/{project_id}", response_model=SummaryResponse, response_model_exclude_none=True)
 async def get_project_summary(project_id: str):
     """
     Retrieve the close-out summary for a specific project.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Query the database for the most recent summary for this project
-        response = supabase.table("project_summaries")\
-            .select("*")\
-            .eq("project_id", project_id)\
-            .order("generated_at", desc=True)\
-            .limit(1)\
-            .execute()
+        summary_data = await get_pool().fetchrow(LATEST_PROJECT_SUMMARY_QUERY, project_id)
             
-        if not response.data or len(response.data) == 0:
+        if not summary_data:
             raise HTTPException(status_code=404, detail="No summary found for this project")
-            
-        summary_data = response.data[0]
         
         # Convert the stored data to the response model
-        return SummaryResponse(
-            summary_id=summary_data["summary_id"],
-            project_id=summary_data["project_id"],
-            client_id=summary_data["client_id"],
-            generated_at=datetime.fromisoformat(summary_data["generated_at"].replace('Z', '+00:00')),
-            content=summary_data["content"]
-        )
+        return SummaryResponse(**dict(summary_data))
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -413,12 +455,13 @@ async def share_summary(summary_id: str, recipients: List[str], message: Optiona
     Share a summary with specified recipients.
     """
     try:
+        now = datetime.now(timezone.utc)
         return {
             "summary_id": summary_id,
             "shared_with": recipients,
-            "shared_at": datetime.now(),
+            "shared_at": now,
             "access_link": f"https://example.com/shared/summaries/{summary_id}",
-            "expires_at": datetime.now()
+            "expires_at": now
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -6,13 +6,19 @@ operating on different tasks, projects, or client interactions.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Union
 from datetime import datetime
 from enum import Enum
 import os
+import json
+import asyncio
+import orjson
 from ..models import ModelManager, ModelRegistry
 from ..models.config import ModelType
+from ..utils.llm_cache import SemanticCache, TTLCache, make_cache_key
+from ..utils.batcher import AsyncBatcher
 
 router = APIRouter(prefix="/context", tags=["context-controller"])
 
@@ -20,6 +26,172 @@ router = APIRouter(prefix="/context", tags=["context-controller"])
 model_registry = ModelRegistry()
 model_manager = ModelManager(model_registry)
 
+# Context reasoning prompts are templated and highly repetitive: byte
+# identical prompts are answered from an exact-match cache. Prompts that
+# also carry free text (a rollback reason) can reuse an answer for a
+# differently worded text, but only within a partition holding the same
+# agent, contexts and operation, since the reasoning names them.
+exact_reasoning_cache = TTLCache(ttl_seconds=900, max_entries=10_000)
+reasoning_partitions = TTLCache(ttl_seconds=3600, max_entries=1024)
+SEMANTIC_MATCH_THRESHOLD = 0.85
+
+# One system prompt shared byte-for-byte by every reasoning call, followed
+# by a short per-operation instruction and the request details as a JSON
+# payload at the end, so the provider can reuse its cached prompt prefix
+# across switch, rollback and compatibility calls
+SYSTEM_PROMPT = """You are the Context Controller for IntelliSync CMS. Your job is to analyze context switches, rollbacks and compatibility between contexts, and ensure proper state transitions.
+
+Each request ends with its details as a JSON object, using these fields:
+- agent_id: the agent whose context is changing
+- from_context: for switches, the context being left, or "unknown"
+- context_type: for switches, one of project, client or task
+- context_id: for switches, the identifier of the context being entered
+- role: for switches, the role the agent holds in the new context
+- scope: for switches, the access scope the agent holds in the new context
+- target_context_id: for rollbacks, the earlier context the agent is returning to; for compatibility checks, the context being entered
+- reason: for rollbacks, why the rollback was requested
+- source_context_id: for compatibility checks, the context being left
+
+Keep the answer under 150 words."""
+
+SWITCH_INSTRUCTION = "Analyze this context switch. Explain its implications, then list the context information that should be preserved or noted:"
+ROLLBACK_INSTRUCTION = "Analyze this context rollback. Explain its implications, then list the context information that should be restored or noted:"
+ANALYZE_INSTRUCTION = "Analyze the compatibility of these contexts. Explain what information needs to be preserved, whether there are any conflicts, and what the implications of the transition are:"
+
+# Reasoning answers are short; a tight cap keeps decode time bounded
+REASONING_MAX_TOKENS = 200
+
+# Short, low-temperature analyses are routed to the small model tier
+REASONING_SERVICE = "context_controller_small"
+
+# Built once; every request reuses the same system message object
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+def build_messages(instruction: str, details: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Builds chat messages with the shared system prompt first and request details last."""
+    return [
+        SYSTEM_MESSAGE,
+        {"role": "user", "content": f"{instruction}\n{json.dumps(details, separators=(',', ':'))}"}
+    ]
+
+def reasoning_key(messages: List[Dict[str, Any]]) -> str:
+    """
+    Cache key for reasoning messages built by build_messages.
+    
+    The system prompt is the same for every call, so only the request-specific
+    user message is hashed.
+    """
+    return make_cache_key(REASONING_SERVICE, messages[-1]["content"])
+
+def reasoning_partition_key(instruction: str, identifiers: Dict[str, Any]) -> str:
+    """Key of the semantic cache partition for an operation on specific agents and contexts."""
+    return make_cache_key(REASONING_SERVICE, instruction, identifiers=identifiers)
+
+def get_partition_cache(partition_key: str) -> SemanticCache:
+    """Returns the semantic cache for a partition, creating it on first use."""
+    cache = reasoning_partitions.get(partition_key)
+    if cache is None:
+        cache = SemanticCache(threshold=SEMANTIC_MATCH_THRESHOLD, ttl_seconds=3600, max_entries=64)
+        reasoning_partitions.set(partition_key, cache)
+    return cache
+
+async def complete_reasoning_batch(
+    requests: List[Tuple[List[Dict[str, Any]], Optional[str]]]
+) -> List[Union[str, Exception]]:
+    """
+    Generates reasoning for a batch of (messages, user) requests, calling the
+    model once per distinct prompt in the batch. A failed call is returned
+    as its exception, so only the requests sharing that prompt fail.
+    """
+    keys = [reasoning_key(messages) for messages, _ in requests]
+    unique = dict(zip(keys, requests))
+
+    async def complete(messages: List[Dict[str, Any]], user: Optional[str]) -> str:
+        response, usage = await model_manager.generate_text(
+            service_name=REASONING_SERVICE,
+            messages=messages,
+            temperature=0.1,  # Low temperature for consistent, focused response
+            max_tokens=REASONING_MAX_TOKENS,
+            user=user
+        )
+        return response["choices"][0]["message"]["content"]
+
+    results = await asyncio.gather(
+        *(complete(messages, user) for messages, user in unique.values()),
+        return_exceptions=True
+    )
+    reasoning_by_key = dict(zip(unique, results))
+    return [reasoning_by_key[key] for key in keys]
+
+# Coalesces concurrent reasoning requests so identical in-flight prompts
+# share a single model call
+reasoning_batcher = AsyncBatcher(complete_reasoning_batch, max_batch=16, max_wait_ms=20)
+
+async def generate_reasoning(
+    messages: List[Dict[str, Any]],
+    user: Optional[str] = None,
+    partition_key: Optional[str] = None,
+    free_text: Optional[str] = None
+) -> Tuple[str, bool]:
+    """
+    Returns the model's reasoning for the messages and whether it was served from cache.
+    
+    Only the exact prompt is looked up unless a partition key and free text
+    are given, in which case an answer for similar free text within the same
+    partition is reused too. The partition must cover every identifying
+    field of the prompt.
+    """
+    key = reasoning_key(messages)
+    cached = exact_reasoning_cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    if partition_key is None or not free_text:
+        reasoning = await reasoning_batcher.submit((messages, user))
+        exact_reasoning_cache.set(key, reasoning)
+        return reasoning, False
+
+    embedding_response, _ = await model_manager.generate_embeddings(
+        service_name="context_controller",
+        texts=free_text
+    )
+    embedding = embedding_response["data"][0]["embedding"]
+
+    cached = get_partition_cache(partition_key).get(embedding)
+    if cached is not None:
+        return cached, True
+
+    reasoning = await reasoning_batcher.submit((messages, user))
+    get_partition_cache(partition_key).set(embedding, reasoning)
+    exact_reasoning_cache.set(key, reasoning)
+    return reasoning, False
+
+async def stream_reasoning(messages: List[Dict[str, Any]], user: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Yields the model's reasoning for the messages as it is generated.
+    """
+    key = reasoning_key(messages)
+    cached = exact_reasoning_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks: List[str] = []
+    async for delta in model_manager.stream_text(
+        service_name=REASONING_SERVICE,
+        messages=messages,
+        temperature=0.1,
+        max_tokens=REASONING_MAX_TOKENS,
+        user=user
+    ):
+        chunks.append(delta)
+        yield delta
+    exact_reasoning_cache.set(key, "".join(chunks))
+
+def sse_event(payload: Any) -> bytes:
+    """Encodes a payload as a server-sent event."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
 class ContextType(str, Enum):
     PROJECT = "project"
     CLIENT = "client" 
@@ -32,7 +204,7 @@ class ContextStatus(str, Enum):
 class ContextMetadata(BaseModel):
     role: str
     scope: str
-    parameters: Dict[str, Any] = {}
+    parameters: Dict[str, Any] = Field(default_factory=dict)
 
 class ContextSwitchRequest(BaseModel):
     agent_id: str
@@ -56,6 +228,8 @@ class ContextResponse(BaseModel):
     status: ContextStatus
     previous_context: Optional[str] = None
     timestamp: datetime
+    reasoning: Optional[str] = None
+    cache_hit: Optional[bool] = None
 
 class CurrentContextResponse(BaseModel):
     agent_id: str
@@ -68,85 +242,119 @@ class RollbackRequest(BaseModel):
     reason: str
 
 @router.post("/switch", response_model=ContextResponse)
-async def switch_context(request: ContextSwitchRequest):
+async def switch_context(request: ContextSwitchRequest, stream: bool = False):
     """
     Switches the active context for an agent or model.
+    
+    With `stream=true` the reasoning is sent as server-sent events of the form
+    `{"reasoning_delta": ...}`, followed by the ContextResponse as the final event.
     """
     try:
         # In a real implementation, this would update context in database
         # and possibly run AI reasoning about the context switch
         
         # Use OpenAI to analyze context switch implications
-        messages = [
-            {"role": "system", "content": "You are the Context Controller for IntelliSync CMS. Your job is to analyze context switches and ensure proper state transitions."},
-            {"role": "user", "content": f"Agent {request.agent_id} is switching context from unknown to {request.context_type}/{request.context_id}. Role: {request.metadata.role}, Scope: {request.metadata.scope}. Analyze implications of this context switch and provide any context information that should be preserved or noted."}
-        ]
-        
-        response, usage = await model_manager.generate_text(
-            service_name="context_controller",
-            messages=messages,
-            temperature=0.1  # Low temperature for consistent, focused response
+        messages = build_messages(
+            SWITCH_INSTRUCTION,
+            {
+                "agent_id": request.agent_id,
+                "from_context": "unknown",
+                "context_type": request.context_type.value,
+                "context_id": request.context_id,
+                "role": request.metadata.role,
+                "scope": request.metadata.scope
+            }
         )
         
-        # Extract reasoning from response
-        reasoning = response["choices"][0]["message"]["content"]
+        context_id = f"ctx-{request.context_type.value}-{request.context_id}"
+        
+        if stream:
+            async def events():
+                chunks: List[str] = []
+                async for delta in stream_reasoning(messages, user=request.agent_id):
+                    chunks.append(delta)
+                    yield sse_event({"reasoning_delta": delta})
+                yield sse_event(ContextResponse(
+                    context_id=context_id,
+                    status=ContextStatus.ACTIVE,
+                    previous_context=None,
+                    timestamp=datetime.now(),
+                    reasoning="".join(chunks)
+                ).model_dump(mode="json"))
+            
+            return StreamingResponse(events(), media_type="text/event-stream")
         
-        # Create context response
-        context_response = ContextResponse(
-            context_id=f"ctx-{request.context_type}-{request.context_id}",
+        reasoning, cache_hit = await generate_reasoning(messages, user=request.agent_id)
+        
+        # Return the context response with AI reasoning
+        return ContextResponse(
+            context_id=context_id,
             status=ContextStatus.ACTIVE,
             previous_context=None,  # Would come from database in real impl
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            reasoning=reasoning,
+            cache_hit=cache_hit
         )
         
-        # Return the context response with AI reasoning
-        return {
-            **context_response.dict(),
-            "reasoning": reasoning
-        }
-        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sample context and history, built once at import for demo purposes
+DEMO_CURRENT_CONTEXT = {
+    "type": "project",
+    "id": "project-123",
+    "metadata": {
+        "role": "executor",
+        "scope": "full_access",
+        "project_name": "AI Chatbot Implementation",
+        "client_id": "client-456"
+    }
+}
+
+DEMO_CONTEXT_HISTORY = [
+    {
+        "context_id": "ctx-client-456",
+        "type": "client",
+        "switched_at": datetime.now()
+    },
+    {
+        "context_id": "ctx-project-123",
+        "type": "project",
+        "switched_at": datetime.now()
+    }
+]
+
+async def fetch_current_context(agent_id: str) -> Dict[str, Any]:
+    """
+    Loads the active context for an agent.
+    """
+    # In a real implementation, this would query the database
+    return {**DEMO_CURRENT_CONTEXT, "activated_at": datetime.now()}
+
+async def fetch_context_history(agent_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Loads the most recent context switches for an agent.
+    """
+    # In a real implementation, this would query the database
+    return DEMO_CONTEXT_HISTORY[:limit]
+
 @router.get("/current", response_model=CurrentContextResponse)
 async def get_current_context(agent_id: str):
     """
     Retrieves the current active context for an agent.
     """
     try:
-        # In a real implementation, this would query the database
-        
-        # Generate sample context for demo purposes
-        current_context = CurrentContext(
-            type="project",
-            id="project-123",
-            metadata={
-                "role": "executor",
-                "scope": "full_access",
-                "project_name": "AI Chatbot Implementation",
-                "client_id": "client-456"
-            },
-            activated_at=datetime.now()
+        # The current context and history are independent, so load them together
+        current_context, context_history = await asyncio.gather(
+            fetch_current_context(agent_id),
+            fetch_context_history(agent_id, limit=10)
         )
         
-        context_history = [
-            ContextHistory(
-                context_id="ctx-client-456",
-                type="client",
-                switched_at=datetime.now()
-            ),
-            ContextHistory(
-                context_id="ctx-project-123", 
-                type="project",
-                switched_at=datetime.now()
-            )
-        ]
-        
-        return CurrentContextResponse(
-            agent_id=agent_id,
-            current_context=current_context,
-            context_history=context_history
-        )
+        return {
+            "agent_id": agent_id,
+            "current_context": current_context,
+            "context_history": context_history
+        }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -160,27 +368,29 @@ async def rollback_context(request: RollbackRequest):
         # In a real implementation, this would revert to a previous context
         
         # Use OpenAI to analyze rollback implications
-        messages = [
-            {"role": "system", "content": "You are the Context Controller for IntelliSync CMS. Your job is to analyze context rollbacks and ensure proper state transitions."},
-            {"role": "user", "content": f"Agent {request.agent_id} is rolling back to context {request.target_context_id}. Reason: {request.reason}. Analyze implications of this rollback and provide any context information that should be restored or noted."}
-        ]
+        identifiers = {
+            "agent_id": request.agent_id,
+            "target_context_id": request.target_context_id
+        }
+        messages = build_messages(ROLLBACK_INSTRUCTION, {**identifiers, "reason": request.reason})
         
-        response, usage = await model_manager.generate_text(
-            service_name="context_controller",
-            messages=messages,
-            temperature=0.1
+        # A rollback to the same context for a similarly worded reason can
+        # reuse an earlier answer
+        reasoning, cache_hit = await generate_reasoning(
+            messages,
+            user=request.agent_id,
+            partition_key=reasoning_partition_key(ROLLBACK_INSTRUCTION, identifiers),
+            free_text=request.reason
         )
         
-        # Extract reasoning from response
-        reasoning = response["choices"][0]["message"]["content"]
-        
-        return {
-            "context_id": request.target_context_id,
-            "status": ContextStatus.ACTIVE,
-            "previous_context": "ctx-current-context-id",  # Would be actual ID in real impl
-            "timestamp": datetime.now(),
-            "reasoning": reasoning
-        }
+        return ContextResponse(
+            context_id=request.target_context_id,
+            status=ContextStatus.ACTIVE,
+            previous_context="ctx-current-context-id",  # Would be actual ID in real impl
+            timestamp=datetime.now(),
+            reasoning=reasoning,
+            cache_hit=cache_hit
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -192,6 +402,7 @@ async def get_context_history(agent_id: str, limit: int = 10):
     """
     try:
         # In a real implementation, this would query the database
+        now = datetime.now()
         
         return {
             "agent_id": agent_id,
@@ -200,13 +411,13 @@ async def get_context_history(agent_id: str, limit: int = 10):
                     "from_context": "ctx-client-456",
                     "to_context": "ctx-project-123",
                     "reason": "Project work started",
-                    "timestamp": datetime.now()
+                    "timestamp": now
                 },
                 {
                     "from_context": "ctx-project-123",
                     "to_context": "ctx-task-789",
                     "reason": "Task assignment",
-                    "timestamp": datetime.now()
+                    "timestamp": now
                 }
             ],
             "total": 2,
@@ -219,34 +430,31 @@ async def get_context_history(agent_id: str, limit: int = 10):
 @router.post("/analyze")
 async def analyze_context_compatibility(
     source_context_id: str,
-    target_context_id: str
+    target_context_id: str,
+    stream: bool = False
 ):
     """
     Analyzes the compatibility of two contexts.
+    
+    With `stream=true` the analysis is sent as server-sent events of the form
+    `{"reasoning_delta": ...}`, followed by the full result as the final event.
     """
     try:
         # In a real implementation, this would retrieve context details and analyze
         
         # Use OpenAI to analyze context compatibility
-        messages = [
-            {"role": "system", "content": "You are the Context Controller for IntelliSync CMS. Your job is to analyze context compatibility and transitions."},
-            {"role": "user", "content": f"Analyze the compatibility between source context {source_context_id} and target context {target_context_id}. What information needs to be preserved? Are there any conflicts? What are the implications of this transition?"}
-        ]
-        
-        response, usage = await model_manager.generate_text(
-            service_name="context_controller",
-            messages=messages,
-            temperature=0.1
+        messages = build_messages(
+            ANALYZE_INSTRUCTION,
+            {
+                "source_context_id": source_context_id,
+                "target_context_id": target_context_id
+            }
         )
         
-        # Extract analysis from response
-        analysis = response["choices"][0]["message"]["content"]
-        
-        return {
+        result = {
             "source_context_id": source_context_id,
             "target_context_id": target_context_id,
             "compatibility_score": 0.85,  # Would be calculated in real impl
-            "analysis": analysis,
             "preservation_needed": ["client_preferences", "communication_history"],
             "potential_conflicts": ["task_priorities"],
             "transition_recommendations": [
@@ -255,5 +463,19 @@ async def analyze_context_compatibility(
             ]
         }
         
+        if stream:
+            async def events():
+                chunks: List[str] = []
+                async for delta in stream_reasoning(messages):
+                    chunks.append(delta)
+                    yield sse_event({"reasoning_delta": delta})
+                yield sse_event({**result, "analysis": "".join(chunks)})
+            
+            return StreamingResponse(events(), media_type="text/event-stream")
+        
+        analysis, cache_hit = await generate_reasoning(messages)
+        
+        return {**result, "analysis": analysis, "cache_hit": cache_hit}
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
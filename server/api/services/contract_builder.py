@@ -3,6 +3,8 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+import asyncio
+from ..utils.llm_cache import async_ttl_cache
 
 router = APIRouter(prefix="/contracts", tags=["contract-builder"])
 
@@ -74,25 +76,68 @@ async def build_contract(request: ContractRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Available templates, built once at import for demo purposes
+CONTRACT_TEMPLATES = (
+    {
+        "id": "template-123",
+        "name": "Standard Service Agreement",
+        "type": ContractType.SERVICE_AGREEMENT.value,
+        "version": "2.0.0"
+    },
+)
+
+# Registered before /{contract_id}, which would otherwise match "templates"
+@router.get("/templates")
+@async_ttl_cache(ttl_seconds=300, max_entries=1)
+async def list_templates():
+    """
+    Returns available contract templates.
+    """
+    try:
+        now = datetime.now()
+        return {
+            "templates": [{**template, "last_updated": now} for template in CONTRACT_TEMPLATES]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def fetch_contract(contract_id: str) -> Dict[str, Any]:
+    """
+    Loads the status and version of a contract.
+    """
+    # In a real implementation, this would query the database
+    return {
+        "id": contract_id,
+        "status": ContractStatus.PENDING_REVIEW,
+        "version": "1.0.0",
+        "last_modified": datetime.now()
+    }
+
+async def fetch_reviewers(contract_id: str) -> List[Dict[str, Any]]:
+    """
+    Loads the reviewers assigned to a contract.
+    """
+    # In a real implementation, this would query the database
+    return [
+        {
+            "id": "user-123",
+            "name": "John Doe",
+            "status": "pending"
+        }
+    ]
+
 @router.get("/{contract_id}")
 async def get_contract_status(contract_id: str):
     """
     Retrieves the current status and details of a contract.
     """
     try:
-        return {
-            "id": contract_id,
-            "status": ContractStatus.PENDING_REVIEW,
-            "version": "1.0.0",
-            "last_modified": datetime.now(),
-            "reviewers": [
-                {
-                    "id": "user-123",
-                    "name": "John Doe",
-                    "status": "pending"
-                }
-            ]
-        }
+        # The contract record and its reviewers are independent, so load them together
+        contract, reviewers = await asyncio.gather(
+            fetch_contract(contract_id),
+            fetch_reviewers(contract_id)
+        )
+        return {**contract, "reviewers": reviewers}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -118,26 +163,6 @@ async def update_contract(contract_id: str, updates: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/templates")
-async def list_templates():
-    """
-    Returns available contract templates.
-    """
-    try:
-        return {
-            "templates": [
-                {
-                    "id": "template-123",
-                    "name": "Standard Service Agreement",
-                    "type": ContractType.SERVICE_AGREEMENT,
-                    "version": "2.0.0",
-                    "last_updated": datetime.now()
-                }
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
 @router.post("/{contract_id}/review")
 async def submit_for_review(contract_id: str):
     """
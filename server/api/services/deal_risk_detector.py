@@ -1,8 +1,12 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from enum import Enum
+import asyncio
+import time
+from ..utils.batcher import BinScheduler
 
 router = APIRouter(prefix="/risks", tags=["deal-risk-detector"])
 
@@ -42,100 +46,131 @@ class HistoricalData(BaseModel):
     key_events: List[KeyEvent]
 
 class DealRiskResponse(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     risk_assessment: RiskAssessment
     historical_data: HistoricalData
 
+async def fetch_risk_assessment(lead_id: str) -> RiskAssessment:
+    """
+    Loads the current risk assessment and warning signals for a lead.
+    """
+    # In a real implementation, this would analyze deal data for risk factors
+    now = datetime.now()
+    return RiskAssessment(
+        risk_score=65.5,
+        risk_level=RiskLevel.MEDIUM,
+        warning_signals=[
+            WarningSignal(
+                type="delayed_response",
+                description="Client has not responded to latest proposal for 7 days",
+                severity=AlertSeverity.WARNING,
+                detected_at=now
+            ),
+            WarningSignal(
+                type="budget_concern",
+                description="Multiple discussions about budget constraints in recent communications",
+                severity=AlertSeverity.WARNING,
+                detected_at=now
+            )
+        ],
+        recommendations=[
+            "Schedule a follow-up call to address budget concerns",
+            "Prepare alternative pricing options",
+            "Involve executive sponsor for relationship reinforcement"
+        ]
+    )
+
+async def fetch_historical_data(lead_id: str) -> HistoricalData:
+    """
+    Loads the risk trend and key events for a lead.
+    """
+    # In a real implementation, this would query the lead's history
+    now = datetime.now()
+    # The trend values are already typed, so per-point validation is skipped
+    return HistoricalData(
+        risk_trend=[
+            RiskTrendPoint.model_construct(timestamp=now, score=score)
+            for score in (45.0, 55.0, 65.5)
+        ],
+        key_events=[
+            KeyEvent(
+                event_type="meeting",
+                description="Initial proposal presentation",
+                timestamp=now
+            ),
+            KeyEvent(
+                event_type="email",
+                description="Client requested budget revisions",
+                timestamp=now
+            )
+        ]
+    )
+
 @router.get("/{lead_id}", response_model=DealRiskResponse)
 async def get_deal_risks(lead_id: str):
     """
     Retrieves risk assessment for a specific lead.
     """
     try:
-        # In a real implementation, this would analyze deal data for risk factors
-        return DealRiskResponse(
-            risk_assessment=RiskAssessment(
-                risk_score=65.5,
-                risk_level=RiskLevel.MEDIUM,
-                warning_signals=[
-                    WarningSignal(
-                        type="delayed_response",
-                        description="Client has not responded to latest proposal for 7 days",
-                        severity=AlertSeverity.WARNING,
-                        detected_at=datetime.now()
-                    ),
-                    WarningSignal(
-                        type="budget_concern",
-                        description="Multiple discussions about budget constraints in recent communications",
-                        severity=AlertSeverity.WARNING,
-                        detected_at=datetime.now()
-                    )
-                ],
-                recommendations=[
-                    "Schedule a follow-up call to address budget concerns",
-                    "Prepare alternative pricing options",
-                    "Involve executive sponsor for relationship reinforcement"
-                ]
-            ),
-            historical_data=HistoricalData(
-                risk_trend=[
-                    RiskTrendPoint(timestamp=datetime.now(), score=45.0),
-                    RiskTrendPoint(timestamp=datetime.now(), score=55.0),
-                    RiskTrendPoint(timestamp=datetime.now(), score=65.5)
-                ],
-                key_events=[
-                    KeyEvent(
-                        event_type="meeting",
-                        description="Initial proposal presentation",
-                        timestamp=datetime.now()
-                    ),
-                    KeyEvent(
-                        event_type="email",
-                        description="Client requested budget revisions",
-                        timestamp=datetime.now()
-                    )
-                ]
-            )
+        # The assessment and history are independent, so load them together
+        risk_assessment, historical_data = await asyncio.gather(
+            fetch_risk_assessment(lead_id),
+            fetch_historical_data(lead_id)
         )
+        response = DealRiskResponse(
+            risk_assessment=risk_assessment,
+            historical_data=historical_data
+        )
+        
+        # The response is already validated; hand it straight to orjson,
+        # which encodes the nested datetimes and enums in C, instead of
+        # re-validating it against the response model and jsonable_encoder
+        return ORJSONResponse(response.model_dump())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sample pipeline health report, built once at import for demo purposes
+PIPELINE_HEALTH = {
+    "overall_health_score": 78.5,
+    "risk_distribution": {
+        "high_risk": 3,
+        "medium_risk": 8,
+        "low_risk": 12
+    },
+    "total_value_at_risk": 450000,
+    "top_risk_factors": [
+        {
+            "factor": "delayed_response",
+            "count": 5,
+            "impact": "high"
+        },
+        {
+            "factor": "budget_concern",
+            "count": 7,
+            "impact": "high"
+        },
+        {
+            "factor": "stakeholder_change",
+            "count": 3,
+            "impact": "medium"
+        }
+    ],
+    "recommendations": [
+        "Focus on the 3 high-risk deals with values over $100K",
+        "Address budget concerns proactively in upcoming meetings",
+        "Implement executive sponsorship program for at-risk deals"
+    ]
+}
+
 @router.get("/pipeline/health")
 async def analyze_pipeline_health():
     """
     Returns overall pipeline health metrics and risk distribution.
     """
     try:
-        return {
-            "overall_health_score": 78.5,
-            "risk_distribution": {
-                "high_risk": 3,
-                "medium_risk": 8,
-                "low_risk": 12
-            },
-            "total_value_at_risk": 450000,
-            "top_risk_factors": [
-                {
-                    "factor": "delayed_response",
-                    "count": 5,
-                    "impact": "high"
-                },
-                {
-                    "factor": "budget_concern",
-                    "count": 7,
-                    "impact": "high"
-                },
-                {
-                    "factor": "stakeholder_change",
-                    "count": 3,
-                    "impact": "medium"
-                }
-            ],
-            "recommendations": [
-                "Focus on the 3 high-risk deals with values over $100K",
-                "Address budget concerns proactively in upcoming meetings",
-                "Implement executive sponsorship program for at-risk deals"
-            ]
-        }
+        # In a real implementation, this would summarize the open deals
+        return ORJSONResponse(PIPELINE_HEALTH)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -159,70 +194,114 @@ async def get_risk_timeline(lead_id: str):
     Retrieves a timeline of risk evolution for a specific lead.
     """
     try:
-        return {
+        now = datetime.now()
+        return ORJSONResponse({
             "lead_id": lead_id,
             "timeline": [
                 {
-                    "date": datetime.now(),
+                    "date": now,
                     "risk_score": 35.0,
                     "notable_events": ["Initial contact", "Discovery call scheduled"]
                 },
                 {
-                    "date": datetime.now(),
+                    "date": now,
                     "risk_score": 40.0,
                     "notable_events": ["Discovery call completed", "Requirements gathering"]
                 },
                 {
-                    "date": datetime.now(),
+                    "date": now,
                     "risk_score": 65.5,
                     "notable_events": ["Budget concerns raised", "Decision maker changed"]
                 }
             ]
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_risk_prompt(lead_id: str) -> str:
+    """
+    Builds the risk scoring prompt for a lead.
+    """
+    # In a real implementation, this would include the lead's deal history,
+    # which is what makes prompt lengths vary between leads
+    return f"Assess the deal risk for lead {lead_id}."
+
+async def score_leads(items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Scores the risk of a batch of (lead_id, prompt) items.
+    """
+    # In a real implementation, this would run the risk model on the batch
+    return [{"risk_score": 65.5, "risk_level": RiskLevel.MEDIUM} for _ in items]
+
+# Leads are batched with others of similar prompt length, so short prompts
+# are not held up by the longest one in a mixed batch
+risk_scheduler = BinScheduler(score_leads, max_batch_sizes=(32, 16, 8))
+
+# Upper bound on leads scored at once by a single batch request
+MAX_CONCURRENT_SCORES = 32
+
+async def score_lead(lead_id: str) -> Dict[str, Any]:
+    """
+    Scores the risk of a single lead through its prompt-length bin.
+    """
+    prompt = build_risk_prompt(lead_id)
+    return await risk_scheduler.submit((lead_id, prompt), prompt_tokens=len(prompt) // 4)
+
+async def _score_bounded(semaphore: asyncio.Semaphore, lead_id: str) -> Dict[str, Any]:
+    async with semaphore:
+        return await score_lead(lead_id)
+
 @router.post("/leads/batch-analyze")
 async def batch_analyze_risks(lead_ids: List[str]):
     """
     Performs risk analysis on multiple leads.
     """
     try:
+        started = time.perf_counter()
+        
+        # Score every distinct lead concurrently, capped so a large batch
+        # cannot flood the database or model
+        unique_ids = list(dict.fromkeys(lead_ids))
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCORES)
+        scores = await asyncio.gather(*(_score_bounded(semaphore, lead_id) for lead_id in unique_ids))
+        results = dict(zip(unique_ids, scores))
+        
         return {
             "analyzed": len(lead_ids),
-            "high_risk_count": 2,
-            "results": {
-                lead_id: {"risk_score": 65.5, "risk_level": "medium"} 
-                for lead_id in lead_ids
-            },
-            "processing_time": "1.2s"
+            "high_risk_count": sum(1 for score in scores if score["risk_level"] == RiskLevel.HIGH),
+            "results": results,
+            "processing_time": f"{time.perf_counter() - started:.1f}s"
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sample risk patterns, built once at import for demo purposes
+RISK_PATTERNS = {
+    "patterns": [
+        {
+            "pattern": "Extended decision timeline",
+            "frequency": "High",
+            "average_impact": 15.5,
+            "affected_deals": 8,
+            "mitigation_strategy": "Implement deal momentum tracking with automated alerts"
+        },
+        {
+            "pattern": "Multiple stakeholder changes",
+            "frequency": "Medium",
+            "average_impact": 25.0,
+            "affected_deals": 4,
+            "mitigation_strategy": "Develop broader relationships within client organization"
+        }
+    ]
+}
+
 @router.get("/patterns")
 async def identify_risk_patterns():
     """
     Identifies common risk patterns across the sales pipeline.
     """
     try:
-        return {
-            "patterns": [
-                {
-                    "pattern": "Extended decision timeline",
-                    "frequency": "High",
-                    "average_impact": 15.5,
-                    "affected_deals": 8,
-                    "mitigation_strategy": "Implement deal momentum tracking with automated alerts"
-                },
-                {
-                    "pattern": "Multiple stakeholder changes",
-                    "frequency": "Medium",
-                    "average_impact": 25.0,
-                    "affected_deals": 4,
-                    "mitigation_strategy": "Develop broader relationships within client organization"
-                }
-            ]
-        }
+        # In a real implementation, this would mine patterns from closed deals
+        return RISK_PATTERNS
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
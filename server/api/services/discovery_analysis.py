@@ -5,12 +5,18 @@ to identify business opportunities, challenges, and potential AI solution fits.
 
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from enum import Enum
 import os
+from functools import lru_cache
+import orjson
 from ..models import ModelManager, ModelRegistry
 from ..models.config import ModelType
+from ..models.openai import get_http_client, close_http_client
+from ..utils.llm_cache import SemanticCache
+from ..utils.settings import get_settings
+from ..utils.batcher import AsyncBatcher
 
 # Initialize model registry and manager
 model_registry = ModelRegistry()
@@ -18,6 +24,49 @@ model_manager = ModelManager(model_registry)
 
 router = APIRouter(prefix="/analyze", tags=["discovery-analysis"])
 
+# Open the shared OpenAI HTTP client up front and close its pooled
+# connections on shutdown; requests never create their own client
+@router.on_event("startup")
+def open_openai_client():
+    get_http_client()
+
+@router.on_event("shutdown")
+async def close_openai_client():
+    await close_http_client()
+
+@lru_cache(maxsize=1)
+def get_analysis_cache() -> SemanticCache:
+    """
+    Returns the cache through which near-identical intakes reuse an earlier
+    analysis instead of calling the model, creating it on first use so the
+    settings are read after the environment is loaded.
+    """
+    settings = get_settings()
+    return SemanticCache(
+        threshold=settings.discovery_cache_threshold,
+        ttl_seconds=86400,
+        max_entries=settings.discovery_cache_max_entries
+    )
+
+# System prompts are identical for every request, so they are built once and
+# kept ahead of the per-request content, where the provider's prompt cache
+# can reuse them. The message dicts are shared and must not be mutated.
+ANALYZE_SYSTEM_PROMPT = """You are the Discovery Analysis agent for IntelliSync CMS.
+Your task is to analyze client intake data and identify:
+1. Business goals with priorities and timelines
+2. Business challenges with impact and urgency
+3. Potential AI opportunities with fit scores and impact assessments
+
+Provide a comprehensive analysis in JSON format with these three sections.
+For each opportunity, include an AI fit score (0-1) and relevant AI solution types."""
+
+REFINE_SYSTEM_PROMPT = """You are the Discovery Analysis agent for IntelliSync CMS.
+Your task is to refine an existing analysis based on new feedback.
+Maintain the same structure and format, but incorporate the feedback."""
+
+ANALYZE_SYSTEM_MESSAGE = {"role": "system", "content": ANALYZE_SYSTEM_PROMPT}
+REFINE_SYSTEM_MESSAGE = {"role": "system", "content": REFINE_SYSTEM_PROMPT}
+
 class BusinessGoal(BaseModel):
     title: str
     description: str
@@ -48,6 +97,40 @@ class AnalysisResult(BaseModel):
     challenges: List[Challenge]
     created_at: datetime
 
+def build_analysis_result(client_id: str, analysis_data: Dict[str, Any], trusted: bool = False) -> AnalysisResult:
+    """
+    Builds an AnalysisResult from parsed analysis data.
+    
+    Model output is validated; `trusted` data that is already known to be
+    well formed skips validation with model_construct.
+    """
+    now = datetime.now()
+    if trusted:
+        return AnalysisResult.model_construct(
+            analysis_id=f"analysis-{client_id}-{now.strftime('%Y%m%d%H%M%S')}",
+            opportunities=[Opportunity.model_construct(**opp) for opp in analysis_data.get("opportunities", [])],
+            business_goals=[BusinessGoal.model_construct(**goal) for goal in analysis_data.get("business_goals", [])],
+            challenges=[Challenge.model_construct(**challenge) for challenge in analysis_data.get("challenges", [])],
+            created_at=now
+        )
+    
+    return AnalysisResult(
+        analysis_id=f"analysis-{client_id}-{now.strftime('%Y%m%d%H%M%S')}",
+        opportunities=[
+            Opportunity(**opp)
+            for opp in analysis_data.get("opportunities", [])
+        ],
+        business_goals=[
+            BusinessGoal(**goal)
+            for goal in analysis_data.get("business_goals", [])
+        ],
+        challenges=[
+            Challenge(**challenge)
+            for challenge in analysis_data.get("challenges", [])
+        ],
+        created_at=now
+    )
+
 @router.post("", response_model=AnalysisResult)
 async def analyze_client_data(request: AnalysisRequest):
     """
@@ -62,32 +145,32 @@ async def analyze_client_data(request: AnalysisRequest):
         Client ID: {request.client_id}
         
         Responses:
-        {json.dumps(client_data.get('responses', {}), indent=2)}
+        {orjson.dumps(client_data.get('responses', {}), option=orjson.OPT_INDENT_2).decode()}
         
         Notes:
         {client_data.get('notes', 'No notes provided')}
         
         Documents:
-        {json.dumps(client_data.get('documents', []), indent=2)}
+        {orjson.dumps(client_data.get('documents', []), option=orjson.OPT_INDENT_2).decode()}
         """
         
         # Create messages for the model
         messages = [
-            {
-                "role": "system", 
-                "content": """You are the Discovery Analysis agent for IntelliSync CMS. 
-                Your task is to analyze client intake data and identify:
-                1. Business goals with priorities and timelines
-                2. Business challenges with impact and urgency
-                3. Potential AI opportunities with fit scores and impact assessments
-                
-                Provide a comprehensive analysis in JSON format with these three sections.
-                For each opportunity, include an AI fit score (0-1) and relevant AI solution types.
-                """
-            },
+            ANALYZE_SYSTEM_MESSAGE,
             {"role": "user", "content": f"Analyze the following client intake data:\n\n{intake_text}"}
         ]
         
+        # Reuse the analysis of a near-identical intake if one is cached, so a
+        # cache hit never pays for a completion
+        embedding_response, _ = await model_manager.generate_embeddings(
+            service_name="discovery_analysis",
+            texts=intake_text
+        )
+        intake_embedding = embedding_response["data"][0]["embedding"]
+        cached_data = get_analysis_cache().get(intake_embedding)
+        if cached_data is not None:
+            return build_analysis_result(request.client_id, cached_data, trusted=True)
+        
         # Generate analysis using OpenAI
         response, usage = await model_manager.generate_text(
             service_name="discovery_analysis",
@@ -102,8 +185,10 @@ async def analyze_client_data(request: AnalysisRequest):
         # Parse the JSON response
         # In a real implementation, we'd handle potential parsing errors more robustly
         try:
-            analysis_data = json.loads(ai_response)
-        except json.JSONDecodeError:
+            analysis_data = orjson.loads(ai_response)
+            from_model = True
+        except orjson.JSONDecodeError:
+            from_model = False
             # If the response isn't valid JSON, try to extract structured data
             # This is a simple fallback for demo purposes
             analysis_data = {
@@ -134,23 +219,15 @@ async def analyze_client_data(request: AnalysisRequest):
                 ]
             }
         
-        # Construct the return object
-        return AnalysisResult(
-            analysis_id=f"analysis-{request.client_id}-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            opportunities=[
-                Opportunity(**opp)
-                for opp in analysis_data.get("opportunities", [])
-            ],
-            business_goals=[
-                BusinessGoal(**goal)
-                for goal in analysis_data.get("business_goals", [])
-            ],
-            challenges=[
-                Challenge(**challenge)
-                for challenge in analysis_data.get("challenges", [])
-            ],
-            created_at=datetime.now()
-        )
+        # Construct the return object; the fallback data is known to be valid
+        result = build_analysis_result(request.client_id, analysis_data, trusted=not from_model)
+        
+        # Only analyses that came back from the model, and passed validation,
+        # are worth reusing
+        if from_model:
+            get_analysis_cache().set(intake_embedding, analysis_data)
+        
+        return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -176,16 +253,10 @@ async def refine_analysis(analysis_id: str, feedback: Dict[str, Any]):
         
         # Use OpenAI to refine the analysis based on feedback
         messages = [
-            {
-                "role": "system", 
-                "content": """You are the Discovery Analysis agent for IntelliSync CMS.
-                Your task is to refine an existing analysis based on new feedback.
-                Maintain the same structure and format, but incorporate the feedback.
-                """
-            },
+            REFINE_SYSTEM_MESSAGE,
             {
                 "role": "user", 
-                "content": f"Refine the analysis with ID {analysis_id} based on this feedback:\n\n{json.dumps(feedback, indent=2)}"
+                "content": f"Refine the analysis with ID {analysis_id} based on this feedback:\n\n{orjson.dumps(feedback, option=orjson.OPT_INDENT_2).decode()}"
             }
         ]
         
@@ -202,13 +273,27 @@ async def refine_analysis(analysis_id: str, feedback: Dict[str, Any]):
             "analysis_id": analysis_id,
             "status": "refined",
             "refinement_count": 1,
-            "refinement_timestamp": datetime.now().isoformat(),
+            "refinement_timestamp": datetime.now(),
             "refinement_reason": list(feedback.keys())[0] if feedback else "general refinement"
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def embed_queries(queries: List[str]) -> List[Tuple[List[float], str]]:
+    """
+    Embeds a batch of search queries in one request, returning (embedding, model) per query.
+    """
+    embedding_response, usage = await model_manager.generate_embeddings(
+        service_name="discovery_analysis",
+        texts=queries
+    )
+    data = sorted(embedding_response["data"], key=lambda item: item["index"])
+    return [(item["embedding"], embedding_response["model"]) for item in data]
+
+# Concurrent searches share one embeddings request
+query_embedder = AsyncBatcher(embed_queries, max_batch=64, max_wait_ms=10)
+
 @router.post("/semantic-search")
 async def semantic_search(query: str, client_id: Optional[str] = None, limit: int = 5):
     """
@@ -216,12 +301,7 @@ async def semantic_search(query: str, client_id: Optional[str] = None, limit: in
     """
     try:
         # Generate embeddings for the query
-        embedding_response, usage = await model_manager.generate_embeddings(
-            service_name="discovery_analysis",
-            texts=query
-        )
-        
-        query_embedding = embedding_response["data"][0]["embedding"]
+        query_embedding, embedding_model = await query_embedder.submit(query)
         
         # In a real implementation, this would search against stored embeddings
         # Return mock results for now
@@ -239,7 +319,7 @@ async def semantic_search(query: str, client_id: Optional[str] = None, limit: in
                     }
                 }
             ],
-            "embedding_model": embedding_response["model"],
+            "embedding_model": embedding_model,
             "total": 1
         }
         
@@ -1,11 +1,19 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from urllib.parse import quote
 import os
-import shutil
-import uuid
+import secrets
+import aiofiles
+import blake3
+from ulid import ULID
+from ..utils import file_index
+from ..utils.settings import get_settings
+from ..utils.llm_cache import TTLCache
+import asyncio
+import time
 
 router = APIRouter(prefix="/files", tags=["filesystem"])
 
@@ -26,6 +34,47 @@ class FileVisibility(str, Enum):
 UPLOAD_DIR = "/tmp/uploads"  # In production, use a proper storage solution
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# SQLite index of uploaded files, kept beside the project directories
+FILE_INDEX_PATH = os.path.join(UPLOAD_DIR, "files.db")
+
+@router.on_event("startup")
+async def open_file_index():
+    await file_index.open_index(FILE_INDEX_PATH)
+
+@router.on_event("shutdown")
+async def close_file_index():
+    await file_index.close_index()
+
+# Uploads are copied to disk in chunks of this many bytes
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+def find_file(project_dir: str, file_id: str) -> Optional[str]:
+    """
+    Returns the name of the file stored for `file_id`, if any.
+    
+    Stored names are `{file_id}{ext}`, or `{file_id}_{name}{ext}` after a
+    rename, so the ID must be followed by the end of the name, "." or "_".
+    """
+    try:
+        with os.scandir(project_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(file_id) and name[len(file_id):len(file_id) + 1] in ("", ".", "_") and entry.is_file(follow_symlinks=False):
+                    return name
+    except FileNotFoundError:
+        pass
+    return None
+
+async def locate_file(project_id: str, project_dir: str, file_id: str) -> Optional[str]:
+    """
+    Returns the stored filename for `file_id`, from the index when possible.
+    """
+    filename = await file_index.find_filename(project_id, file_id)
+    if filename is not None:
+        return filename
+    # Files uploaded before the index existed are only found by scanning
+    return await asyncio.to_thread(find_file, project_dir, file_id)
+
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
@@ -40,28 +89,63 @@ async def upload_file(
     Upload a file to the project filesystem.
     """
     try:
-        file_id = str(uuid.uuid4())
         file_extension = os.path.splitext(file.filename)[1] if file.filename else ""
-        new_filename = f"{file_id}{file_extension}"
         
         # Create project directory if it doesn't exist
         project_dir = os.path.join(UPLOAD_DIR, project_id)
-        os.makedirs(project_dir, exist_ok=True)
+        await asyncio.to_thread(os.makedirs, project_dir, exist_ok=True)
+        
+        # Save the file in chunks without blocking the event loop, hashing
+        # and counting each chunk on the way so the content ID and size cost
+        # no extra read or stat
+        temp_path = os.path.join(project_dir, f".{secrets.token_hex(16)}.part")
+        hasher = blake3.blake3()
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, "wb") as buffer:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    await buffer.write(chunk)
+        except BaseException:
+            os.remove(temp_path)
+            raise
         
+        # Files are addressed by content, so a re-upload of the same bytes
+        # resolves to the copy already stored in the project
+        digest = hasher.hexdigest()
+        file_id = digest[:32]
+        new_filename = f"{file_id}{file_extension}"
         file_path = os.path.join(project_dir, new_filename)
         
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
         # Process tags if provided
         tag_list = tags.split(",") if tags else []
         
+        existing = await file_index.get_file(project_id, file_id)
+        if existing is not None and existing["digest"] == digest and await asyncio.to_thread(os.path.isfile, os.path.join(project_dir, existing["filename"])):
+            await asyncio.to_thread(os.remove, temp_path)
+            # The upload's metadata replaces the stored copy's, as it would
+            # for a new file
+            await file_index.update_metadata(project_id, file_id, category.value, visibility.value, ",".join(tag_list))
+        else:
+            await asyncio.to_thread(os.replace, temp_path, file_path)
+            await file_index.add_file({
+                "project_id": project_id,
+                "file_id": file_id,
+                "filename": new_filename,
+                "digest": digest,
+                "size": size,
+                "mtime": time.time(),
+                "category": category.value,
+                "visibility": visibility.value,
+                "tags": ",".join(tag_list)
+            })
+        
         return {
             "file_id": file_id,
             "project_id": project_id,
             "original_filename": file.filename,
-            "size": os.path.getsize(file_path),
+            "size": size,
             "category": category,
             "description": description,
             "visibility": visibility,
@@ -73,6 +157,59 @@ async def upload_file(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def scan_project_files(project_id: str, project_dir: str) -> List[Dict[str, Any]]:
+    """
+    Lists the stored files in a project directory.
+    """
+    # scandir returns each entry's type with the listing, so only one stat
+    # call is made per file
+    files = []
+    try:
+        with os.scandir(project_dir) as entries:
+            for entry in entries:
+                # Dotfiles are uploads still being written
+                if entry.is_file(follow_symlinks=False) and not entry.name.startswith("."):
+                    stat = entry.stat(follow_symlinks=False)
+                    file_id = os.path.splitext(entry.name)[0]
+                    files.append({
+                        "file_id": file_id,
+                        "filename": entry.name,
+                        "size": stat.st_size,
+                        "last_modified": datetime.fromtimestamp(stat.st_mtime),
+                        "download_url": f"/files/{project_id}/{file_id}"
+                    })
+    except FileNotFoundError:
+        pass
+    return files
+
+# Project listings keyed by project_id, each stored with the mtime of the
+# directory it was scanned from. Creating, renaming or deleting a file
+# changes that mtime, in this process or any other, so a listing is served
+# from memory only while its directory is unchanged.
+listing_cache = TTLCache(ttl_seconds=300, max_entries=1024)
+
+# Directories changed this recently are not cached; some filesystems keep
+# coarse mtimes, so a change in the same tick as the scan could go unseen
+LISTING_SETTLE_NS = 1_000_000_000
+
+async def list_cached_project_files(project_id: str, project_dir: str) -> List[Dict[str, Any]]:
+    """
+    Lists the stored files in a project, rescanning only when the directory changed.
+    """
+    try:
+        mtime_ns = (await asyncio.to_thread(os.stat, project_dir)).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    
+    cached = listing_cache.get(project_id)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    files = await asyncio.to_thread(scan_project_files, project_id, project_dir)
+    if time.time_ns() - mtime_ns > LISTING_SETTLE_NS:
+        listing_cache.set(project_id, (mtime_ns, files))
+    return files
+
 @router.get("/{project_id}")
 async def list_project_files(
     project_id: str,
@@ -85,23 +222,8 @@ async def list_project_files(
     try:
         project_dir = os.path.join(UPLOAD_DIR, project_id)
         
-        if not os.path.exists(project_dir):
-            return {"files": [], "total": 0}
-        
         # In a real implementation, this would query a database instead
-        files = []
-        for filename in os.listdir(project_dir):
-            file_path = os.path.join(project_dir, filename)
-            if os.path.isfile(file_path):
-                file_id = os.path.splitext(filename)[0]
-                files.append({
-                    "file_id": file_id,
-                    "filename": filename,
-                    "size": os.path.getsize(file_path),
-                    "last_modified": datetime.fromtimestamp(os.path.getmtime(file_path)),
-                    "download_url": f"/files/{project_id}/{file_id}"
-                })
-                
+        files = await list_cached_project_files(project_id, project_dir)
         return {"files": files, "total": len(files)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -114,17 +236,30 @@ async def download_file(project_id: str, file_id: str):
     try:
         project_dir = os.path.join(UPLOAD_DIR, project_id)
         
-        # Find the file with the matching ID prefix
-        for filename in os.listdir(project_dir):
-            if filename.startswith(file_id):
-                file_path = os.path.join(project_dir, filename)
-                return FileResponse(
-                    path=file_path,
-                    filename=filename,
-                    media_type="application/octet-stream"
-                )
-                
-        raise HTTPException(status_code=404, detail="File not found")
+        # Look up the stored filename for the ID
+        filename = await locate_file(project_id, project_dir, file_id)
+        if filename is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        # Behind nginx, let it send the file from the kernel with sendfile;
+        # the app only resolves the path
+        accel_prefix = get_settings().files_accel_redirect_prefix
+        if accel_prefix:
+            return Response(
+                media_type="application/octet-stream",
+                headers={
+                    "X-Accel-Redirect": f"{accel_prefix.rstrip('/')}/{quote(project_id)}/{quote(filename)}",
+                    "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"
+                }
+            )
+        
+        return FileResponse(
+            path=os.path.join(project_dir, filename),
+            filename=filename,
+            media_type="application/octet-stream"
+        )
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -136,14 +271,16 @@ async def delete_file(project_id: str, file_id: str):
     try:
         project_dir = os.path.join(UPLOAD_DIR, project_id)
         
-        # Find and delete the file with the matching ID prefix
-        for filename in os.listdir(project_dir):
-            if filename.startswith(file_id):
-                file_path = os.path.join(project_dir, filename)
-                os.remove(file_path)
-                return {"status": "deleted", "file_id": file_id}
-                
-        raise HTTPException(status_code=404, detail="File not found")
+        # Look up and delete the stored file for the ID
+        filename = await locate_file(project_id, project_dir, file_id)
+        if filename is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        await asyncio.to_thread(os.remove, os.path.join(project_dir, filename))
+        await file_index.remove_file(project_id, file_id)
+        return {"status": "deleted", "file_id": file_id}
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -155,24 +292,25 @@ async def rename_file(project_id: str, file_id: str, new_name: str):
     try:
         project_dir = os.path.join(UPLOAD_DIR, project_id)
         
-        # Find the file with the matching ID prefix
-        for filename in os.listdir(project_dir):
-            if filename.startswith(file_id):
-                file_path = os.path.join(project_dir, filename)
-                file_extension = os.path.splitext(filename)[1]
-                new_filename = f"{file_id}_{new_name}{file_extension}"
-                new_file_path = os.path.join(project_dir, new_filename)
-                
-                os.rename(file_path, new_file_path)
-                
-                return {
-                    "file_id": file_id,
-                    "original_filename": filename,
-                    "new_filename": new_filename,
-                    "download_url": f"/files/{project_id}/{file_id}"
-                }
-                
-        raise HTTPException(status_code=404, detail="File not found")
+        # Look up the stored filename for the ID
+        filename = await locate_file(project_id, project_dir, file_id)
+        if filename is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        file_extension = os.path.splitext(filename)[1]
+        new_filename = f"{file_id}_{new_name}{file_extension}"
+        
+        await asyncio.to_thread(os.rename, os.path.join(project_dir, filename), os.path.join(project_dir, new_filename))
+        await file_index.rename_file(project_id, file_id, new_filename)
+        
+        return {
+            "file_id": file_id,
+            "original_filename": filename,
+            "new_filename": new_filename,
+            "download_url": f"/files/{project_id}/{file_id}"
+        }
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -208,11 +346,11 @@ async def create_folder(project_id: str, folder_name: str):
     """
     try:
         project_dir = os.path.join(UPLOAD_DIR, project_id)
-        os.makedirs(project_dir, exist_ok=True)
         
-        folder_id = str(uuid.uuid4())
+        # ULIDs sort by creation time, so folder names list in creation order
+        folder_id = str(ULID())
         folder_path = os.path.join(project_dir, f"{folder_id}_{folder_name}")
-        os.makedirs(folder_path, exist_ok=True)
+        await asyncio.to_thread(os.makedirs, folder_path, exist_ok=True)
         
         return {
             "folder_id": folder_id,
@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from enum import Enum
+import re
+import orjson
+from ..models import ModelManager, ModelRegistry
+
+# Initialize model registry and manager
+model_registry = ModelRegistry()
+model_manager = ModelManager(model_registry)
 
 router = APIRouter(prefix="/reminders", tags=["follow-up-reminder"])
 
@@ -44,53 +52,85 @@ class SnoozeRequest(BaseModel):
     duration: str  # e.g., "1d", "4h", "1w"
     reason: Optional[str] = None
 
+# Snooze durations are a count followed by a unit, e.g. "1d", "4h", "1w"
+DURATION_PATTERN = re.compile(r"^(\d+)([hdw])$")
+DURATION_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+# Sample reminders, built and validated once at import for demo purposes.
+# Each is stored with its due date and last interaction as offsets from
+# now, which are the only fields filled in per request.
+SAMPLE_REMINDERS = (
+    (
+        Reminder(
+            id="reminder-123",
+            type=ReminderType.FOLLOW_UP,
+            priority=ReminderPriority.HIGH,
+            due_date=datetime.min,
+            context=ReminderContext(
+                client_id="client-456",
+                lead_id="lead-789",
+                last_interaction=datetime.min,
+                suggested_actions=[
+                    "Review proposal feedback",
+                    "Schedule next meeting",
+                    "Prepare pricing options"
+                ]
+            )
+        ),
+        timedelta(days=1),
+        timedelta(days=5)
+    ),
+    (
+        Reminder(
+            id="reminder-124",
+            type=ReminderType.CHECK_IN,
+            priority=ReminderPriority.MEDIUM,
+            due_date=datetime.min,
+            context=ReminderContext(
+                client_id="client-457",
+                lead_id="lead-790",
+                last_interaction=datetime.min,
+                suggested_actions=[
+                    "Check project satisfaction",
+                    "Discuss potential expansion opportunities"
+                ]
+            )
+        ),
+        timedelta(days=3),
+        timedelta(days=10)
+    )
+)
+
+SAMPLE_REMINDER_METADATA = ReminderMetadata(
+    total_count=2,
+    urgent_count=1,
+    overdue_count=0
+)
+
 @router.get("/{user_id}", response_model=ReminderResponse)
 async def get_user_reminders(user_id: str):
     """
     Retrieves all pending reminders for a user.
     """
     try:
-        # In a real implementation, this would query the database for reminders
-        return ReminderResponse(
+        now = datetime.now()
+        # In a real implementation, this would query the database for reminders.
+        # The templates are already validated, so copying them with fresh
+        # timestamps skips rebuilding and revalidating every model
+        response = ReminderResponse.model_construct(
             reminders=[
-                Reminder(
-                    id="reminder-123",
-                    type=ReminderType.FOLLOW_UP,
-                    priority=ReminderPriority.HIGH,
-                    due_date=datetime.now() + timedelta(days=1),
-                    context=ReminderContext(
-                        client_id="client-456",
-                        lead_id="lead-789",
-                        last_interaction=datetime.now() - timedelta(days=5),
-                        suggested_actions=[
-                            "Review proposal feedback",
-                            "Schedule next meeting",
-                            "Prepare pricing options"
-                        ]
-                    )
-                ),
-                Reminder(
-                    id="reminder-124",
-                    type=ReminderType.CHECK_IN,
-                    priority=ReminderPriority.MEDIUM,
-                    due_date=datetime.now() + timedelta(days=3),
-                    context=ReminderContext(
-                        client_id="client-457",
-                        lead_id="lead-790",
-                        last_interaction=datetime.now() - timedelta(days=10),
-                        suggested_actions=[
-                            "Check project satisfaction",
-                            "Discuss potential expansion opportunities"
-                        ]
-                    )
-                )
+                template.model_copy(update={
+                    "due_date": now + due_in,
+                    "context": template.context.model_copy(update={"last_interaction": now - last_seen})
+                })
+                for template, due_in, last_seen in SAMPLE_REMINDERS
             ],
-            metadata=ReminderMetadata(
-                total_count=2,
-                urgent_count=1,
-                overdue_count=0
-            )
+            metadata=SAMPLE_REMINDER_METADATA
         )
+        
+        # The response is already validated; hand it straight to orjson
+        # instead of re-validating it against the response model
+        return ORJSONResponse(response.model_dump())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -100,26 +140,27 @@ async def snooze_reminder(request: SnoozeRequest):
     Delays a reminder for a specified duration.
     """
     try:
+        now = datetime.now()
         # Parse duration string (e.g., "1d" -> 1 day)
-        duration_unit = request.duration[-1]
-        duration_value = int(request.duration[:-1])
+        match = DURATION_PATTERN.match(request.duration)
+        if not match:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid duration: {request.duration}. Use a number followed by h, d or w"
+            )
         
-        if duration_unit == 'd':
-            new_date = datetime.now() + timedelta(days=duration_value)
-        elif duration_unit == 'h':
-            new_date = datetime.now() + timedelta(hours=duration_value)
-        elif duration_unit == 'w':
-            new_date = datetime.now() + timedelta(weeks=duration_value)
-        else:
-            raise ValueError(f"Invalid duration unit: {duration_unit}")
+        duration_value, duration_unit = match.groups()
+        new_date = now + timedelta(**{DURATION_UNITS[duration_unit]: int(duration_value)})
         
         return {
             "reminder_id": request.reminder_id,
-            "original_due_date": datetime.now() + timedelta(days=1),
+            "original_due_date": now + timedelta(days=1),
             "new_due_date": new_date,
             "reason": request.reason,
-            "snoozed_at": datetime.now()
+            "snoozed_at": now
         }
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -136,6 +177,7 @@ async def create_follow_up(
     Creates a new follow-up reminder.
     """
     try:
+        now = datetime.now()
         return {
             "id": "reminder-125",
             "type": type,
@@ -144,10 +186,10 @@ async def create_follow_up(
             "context": {
                 "client_id": client_id,
                 "lead_id": lead_id,
-                "last_interaction": datetime.now(),
+                "last_interaction": now,
                 "suggested_actions": suggested_actions or []
             },
-            "created_at": datetime.now()
+            "created_at": now
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -168,53 +210,59 @@ async def complete_reminder(id: str, outcome: str, next_steps: Optional[List[str
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sample overdue reminder for demo purposes; only its due date is per request
+SAMPLE_OVERDUE_REMINDER = {
+    "id": "reminder-126",
+    "type": ReminderType.FOLLOW_UP,
+    "priority": ReminderPriority.HIGH,
+    "days_overdue": 2,
+    "client": {
+        "id": "client-458",
+        "name": "Acme Corporation"
+    }
+}
+
 @router.get("/overdue/{user_id}")
 async def get_overdue_reminders(user_id: str):
     """
     Retrieves all overdue reminders for a user.
     """
     try:
+        now = datetime.now()
         return {
             "overdue_count": 2,
             "reminders": [
-                {
-                    "id": "reminder-126",
-                    "type": ReminderType.FOLLOW_UP,
-                    "priority": ReminderPriority.HIGH,
-                    "due_date": datetime.now() - timedelta(days=2),
-                    "days_overdue": 2,
-                    "client": {
-                        "id": "client-458",
-                        "name": "Acme Corporation"
-                    }
-                }
+                {**SAMPLE_OVERDUE_REMINDER, "due_date": now - timedelta(days=2)}
             ]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+SAMPLE_PRIORITY_DISTRIBUTION = {
+    "high": 2,
+    "medium": 2,
+    "low": 1
+}
+
 @router.get("/upcoming/{days}")
 async def get_upcoming_reminders(days: int = 7):
     """
     Retrieves reminders due in the next specified number of days.
     """
     try:
-        end_date = datetime.now() + timedelta(days=days)
+        now = datetime.now()
+        end_date = now + timedelta(days=days)
         return {
             "period": f"Next {days} days",
             "total_reminders": 5,
-            "priority_distribution": {
-                "high": 2,
-                "medium": 2,
-                "low": 1
-            },
+            "priority_distribution": SAMPLE_PRIORITY_DISTRIBUTION,
             "daily_breakdown": [
                 {
-                    "date": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+                    "date": (now + timedelta(days=1)).date(),
                     "count": 2
                 },
                 {
-                    "date": (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d"),
+                    "date": (now + timedelta(days=3)).date(),
                     "count": 3
                 }
             ]
@@ -222,36 +270,84 @@ async def get_upcoming_reminders(days: int = 7):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+SUGGESTED_ACTIONS_PROMPT = """You are the Follow-up Reminder agent for IntelliSync CMS.
+Suggest up to three short, concrete next actions for the reminder you are given.
+Reply with one action per line and nothing else."""
+
+# Largest batch accepted by POST /reminders/batch; each reminder without
+# suggested actions costs one model call
+MAX_BATCH_REMINDERS = 100
+
+def build_actions_messages(reminder: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Builds the chat messages asking the model for a reminder's suggested actions.
+    """
+    return [
+        {"role": "system", "content": SUGGESTED_ACTIONS_PROMPT},
+        {"role": "user", "content": f"Reminder:\n{orjson.dumps(reminder, default=str).decode()}"}
+    ]
+
 @router.post("/batch")
 async def create_batch_reminders(reminders: List[Dict[str, Any]]):
     """
     Creates multiple reminders in a batch.
     """
     try:
+        if len(reminders) > MAX_BATCH_REMINDERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"A batch can hold at most {MAX_BATCH_REMINDERS} reminders"
+            )
+        
+        # Reminders created without suggested actions get them from the model,
+        # with the whole batch sent concurrently rather than one call at a time
+        pending = [i for i, reminder in enumerate(reminders) if not reminder.get("suggested_actions")]
+        suggested_actions = [reminder.get("suggested_actions") or [] for reminder in reminders]
+        if pending:
+            responses = await model_manager.generate_text_batch(
+                service_name="follow_up_reminder",
+                messages_list=[build_actions_messages(reminders[i]) for i in pending],
+                temperature=0.3,
+                max_tokens=150
+            )
+            for i, result in zip(pending, responses):
+                # A failed completion leaves that reminder without suggestions
+                if isinstance(result, Exception):
+                    continue
+                response, usage = result
+                content = response["choices"][0]["message"]["content"] or ""
+                suggested_actions[i] = [line.strip("-• ").strip() for line in content.splitlines() if line.strip()]
+        
+        reminder_ids = [f"reminder-{i}" for i in range(127, 127 + len(reminders))]
         return {
             "created_count": len(reminders),
-            "reminder_ids": [f"reminder-{i}" for i in range(127, 127 + len(reminders))],
+            "reminder_ids": reminder_ids,
+            "suggested_actions": dict(zip(reminder_ids, suggested_actions)),
             "created_at": datetime.now()
         }
+    except HTTPException as he:
+        raise he
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sample completion statistics for demo purposes
+SAMPLE_STATISTICS = {
+    "total_reminders": 45,
+    "completed_on_time": 32,
+    "completed_late": 8,
+    "snoozed": 3,
+    "pending": 2,
+    "completion_rate": 0.89,
+    "average_completion_time": "1.5 days",
+    "most_common_type": "follow_up"
+}
+
 @router.get("/statistics/{user_id}")
 async def get_reminder_statistics(user_id: str):
     """
     Retrieves reminder completion statistics for a user.
     """
     try:
-        return {
-            "user_id": user_id,
-            "total_reminders": 45,
-            "completed_on_time": 32,
-            "completed_late": 8,
-            "snoozed": 3,
-            "pending": 2,
-            "completion_rate": 0.89,
-            "average_completion_time": "1.5 days",
-            "most_common_type": "follow_up"
-        }
+        return {"user_id": user_id, **SAMPLE_STATISTICS}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
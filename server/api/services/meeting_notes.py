@@ -1,20 +1,130 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import List, Optional, Dict, Any, Iterator
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-import uuid
+import secrets
 import os
+import asyncio
 import logging
-import textwrap
+import hashlib
+import re
+import orjson
+from functools import lru_cache
+from collections import defaultdict
 from supabase import create_client
-from openai import OpenAI
+from jinja2 import Environment, FileSystemLoader
+from ..models import ModelManager, ModelRegistry
+from ..utils.settings import get_settings
+from ..utils.llm_cache import TTLCache
+from ..utils.database import init_pool, close_pool, get_pool
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Initialize model registry and manager
+model_registry = ModelRegistry()
+model_manager = ModelManager(model_registry)
+
 router = APIRouter(prefix="/meeting-notes", tags=["meeting-notes"])
 
+def format_long_date(value: str) -> str:
+    """Formats a stored ISO timestamp as e.g. "March 04, 2025"."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%B %d, %Y")
+
+# Email templates, compiled once at import. Autoescaping keeps user-supplied
+# text such as the sender's message from injecting markup.
+template_env = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "meeting_notes")),
+    autoescape=True
+)
+template_env.filters["long_date"] = format_long_date
+SHARE_EMAIL_TEMPLATE = template_env.get_template("share_email.html")
+EXPORT_TEMPLATE = template_env.get_template("export.html")
+
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Returns the shared Supabase client, creating it on first use."""
+    settings = get_settings()
+    return create_client(settings.supabase_url, settings.supabase_key)
+
+@router.on_event("startup")
+def prime_supabase():
+    try:
+        get_supabase()
+    except Exception as e:
+        logger.warning(f"Deferred Supabase client creation: {str(e)}")
+
+@router.on_event("startup")
+async def open_db_pool():
+    await init_pool()
+
+@router.on_event("shutdown")
+async def close_db_pool():
+    await close_pool()
+
+async def execute_query(query):
+    """Runs a blocking Supabase query in a worker thread, so independent queries can overlap."""
+    return await asyncio.to_thread(query.execute)
+
+# meeting_notes rows by ID. Every handler for a single meeting reads the
+# row, and rows are only written when created, so repeat reads within the
+# TTL skip the database.
+notes_cache = TTLCache(ttl_seconds=60, max_entries=10_000)
+
+# Rows are read as JSON so they have the same shape as the Supabase
+# client's, with timestamps as ISO strings
+NOTES_BY_ID_QUERY = "SELECT to_jsonb(n) - 'search_tsv' - 'embedding' FROM meeting_notes n WHERE n.id = $1"
+ACTION_ITEMS_BY_NOTES_QUERY = "SELECT COALESCE(jsonb_agg(a), '[]'::jsonb) FROM action_items a WHERE a.notes_id = $1"
+ACTION_ITEM_COUNTS_QUERY = """
+    SELECT notes_id, status::text AS status, count(*) AS count
+    FROM action_items
+    WHERE notes_id = ANY($1::text[])
+    GROUP BY notes_id, status
+"""
+UPDATE_ACTION_ITEM_QUERY = """
+    UPDATE action_items
+    SET status = $3, notes = COALESCE($4, notes), updated_at = $5
+    WHERE id = $1 AND notes_id = $2
+    RETURNING to_jsonb(action_items)
+"""
+
+async def fetch_notes_row(notes_id: str) -> Optional[Dict[str, Any]]:
+    """Returns the meeting_notes row for an ID, from the cache when possible. Callers must not mutate it."""
+    notes_data = notes_cache.get(notes_id)
+    if notes_data is None:
+        notes_data = await get_pool().fetchval(NOTES_BY_ID_QUERY, notes_id)
+        if notes_data:
+            notes_cache.set(notes_id, notes_data)
+    return notes_data
+
+async def fetch_action_items(notes_id: str) -> List[Dict[str, Any]]:
+    """Returns the action_items rows for a meeting."""
+    return await get_pool().fetchval(ACTION_ITEMS_BY_NOTES_QUERY, notes_id)
+
+# Size of the meeting_notes.embedding vectors
+EMBEDDING_DIMENSIONS = 1536
+
+def note_search_text(note: Dict[str, Any]) -> str:
+    """Joins the searchable text fields of a meeting_notes row, as the search index does."""
+    return " ".join(filter(None, [
+        note.get("title"),
+        note.get("summary"),
+        " ".join(note.get("key_points") or []),
+        " ".join(note.get("decisions") or []),
+        " ".join(note.get("topics_discussed") or [])
+    ]))
+
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embeds texts in one request, returning the embeddings in input order."""
+    response, usage = await model_manager.generate_embeddings(
+        service_name="meeting_notes",
+        texts=texts,
+        dimensions=EMBEDDING_DIMENSIONS
+    )
+    return [item["embedding"] for item in sorted(response["data"], key=lambda item: item["index"])]
+
 class MeetingType(str, Enum):
     DISCOVERY = "discovery"
     SALES = "sales"
@@ -51,6 +161,12 @@ class ActionItem(BaseModel):
     status: ActionItemStatus = ActionItemStatus.PENDING
     notes: Optional[str] = None
 
+class ActionItemCreate(BaseModel):
+    description: str
+    assigned_to: str
+    due_date: Optional[datetime] = None
+    notes: Optional[str] = None
+
 class MeetingNotes(BaseModel):
     id: str
     title: str
@@ -140,20 +256,106 @@ async def summarize_meeting(request: NotesSummaryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Transcripts summarized per model call by the bulk endpoint
+SUMMARY_BATCH_SIZE = 5
+
+SUMMARY_BATCH_PROMPT = """You are the Meeting Notes agent for IntelliSync CRM.
+You are given numbered meeting transcripts. Summarize each one and reply with
+only a JSON array holding one object per transcript, in the same order, each
+with the keys "title", "summary", "key_points", "decisions",
+"topics_discussed" (lists of short strings) and "action_items" (a list of
+objects with "description" and "assigned_to")."""
+
+# Outermost JSON array in an LLM response (first "[" to last "]")
+JSON_ARRAY_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+
+def build_summary_batch_messages(requests: List[NotesSummaryRequest]) -> List[Dict[str, str]]:
+    """
+    Builds the chat messages asking the model to summarize a batch of transcripts.
+    """
+    transcripts = "\n\n".join(
+        f"Transcript {i}: {request.meeting_type.value} meeting on {request.date.date()}, "
+        f"attendees: {', '.join(attendee.name for attendee in request.attendees)}\n{request.transcript}"
+        for i, request in enumerate(requests, start=1)
+    )
+    return [
+        {"role": "system", "content": SUMMARY_BATCH_PROMPT},
+        {"role": "user", "content": transcripts}
+    ]
+
+def parse_summary_batch(text: str, requests: List[NotesSummaryRequest]) -> List[NotesSummaryResponse]:
+    """
+    Parses the model's JSON array of summaries into responses for a batch.
+    """
+    match = JSON_ARRAY_PATTERN.search(text)
+    summaries = orjson.loads(match.group(0) if match else text)
+    if len(summaries) != len(requests):
+        raise ValueError(f"Expected {len(requests)} summaries, got {len(summaries)}")
+    
+    return [
+        NotesSummaryResponse(
+            notes_id=f"notes-{secrets.token_hex(4)}",
+            title=request.title or summary.get("title") or "Meeting Summary",
+            key_points=summary.get("key_points", []),
+            action_items=[
+                ActionItem(
+                    id=f"action-{secrets.token_hex(4)}",
+                    description=item["description"],
+                    assigned_to=item.get("assigned_to") or ""
+                )
+                for item in summary.get("action_items", [])
+            ],
+            decisions=summary.get("decisions", []),
+            topics_discussed=summary.get("topics_discussed", []),
+            summary=summary.get("summary", "")
+        )
+        for request, summary in zip(requests, summaries)
+    ]
+
+@router.post("/summarize/bulk", response_model=List[NotesSummaryResponse])
+async def summarize_meetings_bulk(requests: List[NotesSummaryRequest]):
+    """
+    Summarizes several meeting transcripts, several per model call.
+    """
+    try:
+        # Pack transcripts into batches so the instructions are sent once per
+        # batch rather than once per transcript, and run the batches concurrently
+        batches = [
+            requests[i:i + SUMMARY_BATCH_SIZE]
+            for i in range(0, len(requests), SUMMARY_BATCH_SIZE)
+        ]
+        completions = await model_manager.generate_text_batch(
+            service_name="meeting_notes",
+            messages_list=[build_summary_batch_messages(batch) for batch in batches],
+            temperature=0.2
+        )
+        
+        results = []
+        for batch, completion in zip(batches, completions):
+            if isinstance(completion, Exception):
+                raise completion
+            response, usage = completion
+            results.extend(parse_summary_batch(response["choices"][0]["message"]["content"], batch))
+        
+        logger.info(f"Summarized {len(results)} meetings in {len(batches)} model calls")
+        
+        return results
+    except Exception as e:
+        logger.error(f"Failed to summarize meetings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("", response_model=MeetingNotes)
 async def create_meeting_notes(notes: MeetingNotes):
     """
     Create a new meeting notes entry.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
+        supabase = get_supabase()
+        now_iso = datetime.now(timezone.utc).isoformat()
         
         # Generate a unique ID if not provided
         if not notes.id or notes.id == "":
-            notes.id = f"notes-{uuid.uuid4().hex[:8]}"
+            notes.id = f"notes-{secrets.token_hex(4)}"
         
         # Prepare data for storage
         notes_data = {
@@ -165,12 +367,12 @@ async def create_meeting_notes(notes: MeetingNotes):
             "date": notes.date.isoformat(),
             "duration_minutes": notes.duration_minutes,
             "attendees": [att.dict() for att in notes.attendees],
-            "summary": notes.summary,
+            "summary": notes.notes,
             "key_points": notes.key_points,
             "decisions": notes.decisions,
             "topics_discussed": notes.topics_discussed,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now_iso,
+            "updated_at": now_iso
         }
         
         # Store action items separately if provided
@@ -179,7 +381,7 @@ async def create_meeting_notes(notes: MeetingNotes):
             for item in notes.action_items:
                 # Generate ID for action item if not provided
                 if not item.id or item.id == "":
-                    item.id = f"action-{uuid.uuid4().hex[:8]}"
+                    item.id = f"action-{secrets.token_hex(4)}"
                 
                 action_items_data.append({
                     "id": item.id,
@@ -189,16 +391,23 @@ async def create_meeting_notes(notes: MeetingNotes):
                     "due_date": item.due_date.isoformat() if item.due_date else None,
                     "status": item.status,
                     "notes": item.notes,
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat()
+                    "created_at": now_iso,
+                    "updated_at": now_iso
                 })
         
-        # Insert meeting notes into database
-        supabase.table("meeting_notes").insert(notes_data).execute()
+        # Embed the notes for semantic search; if that fails they are still
+        # searchable by text and the backfill picks them up later
+        try:
+            notes_data["embedding"] = (await embed_texts([note_search_text(notes_data)]))[0]
+        except Exception as e:
+            logger.warning(f"Failed to embed meeting notes {notes.id}: {str(e)}")
         
-        # Insert action items if any
-        if action_items_data:
-            supabase.table("action_items").insert(action_items_data).execute()
+        # Insert the notes and their action items in one transaction
+        await execute_query(supabase.rpc("create_notes_with_actions", {
+            "notes": notes_data,
+            "action_items": action_items_data
+        }))
+        notes_cache.pop(notes.id)
         
         # Log the creation
         logger.info(f"Created meeting notes {notes.id} for {notes.meeting_type} meeting: {notes.title}")
@@ -208,52 +417,240 @@ async def create_meeting_notes(notes: MeetingNotes):
         logger.error(f"Failed to create meeting notes: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{notes_id}", response_model=MeetingNotes)
-async def get_meeting_notes(notes_id: str):
+# Most notes returned by a single search
+SEARCH_RESULT_LIMIT = 50
+# Reciprocal rank fusion constant; larger values flatten the gap between
+# the top few results of each list
+RRF_K = 60
+# Best possible fused score, for a note ranked first by both searches
+RRF_MAX_SCORE = 2 / (RRF_K + 1)
+
+@router.get("/search")
+async def search_meeting_notes(
+    query: str,
+    client_id: Optional[str] = None,
+    project_id: Optional[str] = None,
+    meeting_type: Optional[MeetingType] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+):
     """
-    Retrieve meeting notes by ID.
+    Search meeting notes by content.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Fetch meeting notes
-        notes_response = supabase.table("meeting_notes")\
-            .select("*")\
-            .eq("id", notes_id)\
-            .single()\
-            .execute()
-            
-        if not notes_response.data:
-            raise HTTPException(status_code=404, detail="Meeting notes not found")
+        supabase = get_supabase()
+        
+        # Normalize search query
+        normalized_query = query.lower().strip()
+        
+        filters = {
+            "p_client_id": client_id,
+            "p_project_id": project_id,
+            "p_meeting_type": meeting_type.value if meeting_type else None,
+            "p_date_from": date_from.isoformat() if date_from else None,
+            "p_date_to": date_to.isoformat() if date_to else None
+        }
         
-        notes_data = notes_response.data
+        # Match and rank in Postgres with the full-text index, so only the
+        # matching notes come back, while the query is embedded for the
+        # semantic match
+        text_search = execute_query(supabase.rpc("search_meeting_notes", {
+            "q": query,
+            "p_limit": SEARCH_RESULT_LIMIT,
+            **filters
+        }))
+        text_response, query_embeddings = await asyncio.gather(
+            text_search,
+            embed_texts([query]),
+            return_exceptions=True
+        )
+        if isinstance(text_response, BaseException):
+            raise text_response
+        
+        # Merge the two result lists by reciprocal rank, since text ranks and
+        # cosine similarities are on different scales
+        notes_by_id = {}
+        result_lists = [text_response.data]
+        if isinstance(query_embeddings, BaseException):
+            logger.warning(f"Semantic search unavailable, using text search only: {str(query_embeddings)}")
+        else:
+            vector_response = await execute_query(supabase.rpc("match_meeting_notes", {
+                "query_embedding": query_embeddings[0],
+                "match_count": SEARCH_RESULT_LIMIT,
+                **filters
+            }))
+            result_lists.append(vector_response.data)
+        for result_list in result_lists:
+            for position, note in enumerate(result_list, start=1):
+                merged = notes_by_id.setdefault(note["id"], {**note, "score": 0.0})
+                merged["score"] += 1 / (RRF_K + position)
+        
+        notes = sorted(notes_by_id.values(), key=lambda note: note["score"], reverse=True)[:SEARCH_RESULT_LIMIT]
         
-        # Fetch action items for these notes
-        action_items_response = supabase.table("action_items")\
-            .select("*")\
-            .eq("notes_id", notes_id)\
-            .execute()
+        # If no notes found, return empty results
+        if not notes:
+            return {
+                "query": query,
+                "results": [],
+                "total": 0
+            }
+        
+        # For each note, find the fields containing the query for context;
+        # semantic matches may have none
+        results = []
+        for note in notes:
+            matches = []
+            
+            # Check title match
+            title = note.get("title") or ""
+            if normalized_query in title.lower():
+                matches.append({
+                    "field": "title",
+                    "context": title
+                })
+            
+            # Check summary match, lowercasing and scanning it only once
+            summary = note.get("summary") or ""
+            match_idx = summary.lower().find(normalized_query)
+            if match_idx >= 0:
+                # Get context around the match
+                start_idx = max(0, match_idx - 20)
+                end_idx = min(len(summary), match_idx + len(normalized_query) + 20)
+                context = "..." + summary[start_idx:end_idx] + "..."
+                matches.append({
+                    "field": "summary",
+                    "context": context
+                })
+            
+            # Check key points match
+            for i, point in enumerate(note.get("key_points", [])):
+                if normalized_query in point.lower():
+                    matches.append({
+                        "field": "key_points",
+                        "context": point
+                    })
+            
+            # Check decisions match
+            for i, decision in enumerate(note.get("decisions", [])):
+                if normalized_query in decision.lower():
+                    matches.append({
+                        "field": "decisions",
+                        "context": decision
+                    })
+            
+            # Check topics match
+            for i, topic in enumerate(note.get("topics_discussed", [])):
+                if normalized_query in topic.lower():
+                    matches.append({
+                        "field": "topics_discussed",
+                        "context": topic
+                    })
             
-        action_items = action_items_response.data
+            # Format date
+            note_date = datetime.fromisoformat(note["date"].replace("Z", "+00:00"))
+            
+            results.append({
+                "id": note["id"],
+                "title": note["title"],
+                "meeting_type": note["meeting_type"],
+                "date": note_date.isoformat(),
+                "relevance_score": note["score"] / RRF_MAX_SCORE,  # Fused rank, 0-1
+                "matches": matches
+            })
         
-        # Convert date strings to datetime objects
-        notes_data["date"] = datetime.fromisoformat(notes_data["date"].replace("Z", "+00:00"))
+        # Log the search
+        logger.info(f"Searched meeting notes for '{query}' with {len(results)} results")
         
-        # Process action items
-        for item in action_items:
-            if item.get("due_date"):
-                item["due_date"] = datetime.fromisoformat(item["due_date"].replace("Z", "+00:00"))
+        return {
+            "query": query,
+            "results": results,
+            "total": len(results)
+        }
+    except Exception as e:
+        logger.error(f"Failed to search meeting notes: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Notes embedded per request by the backfill
+EMBEDDING_BACKFILL_BATCH_SIZE = 256
+
+@router.post("/embeddings/backfill")
+async def backfill_note_embeddings(max_batches: int = 10):
+    """
+    Embeds meeting notes that have no embedding yet, in batches.
+    """
+    try:
+        supabase = get_supabase()
+        
+        embedded = 0
+        for _ in range(max_batches):
+            response = await execute_query(
+                supabase.table("meeting_notes")
+                    .select("id, title, summary, key_points, decisions, topics_discussed")
+                    .is_("embedding", "null")
+                    .limit(EMBEDDING_BACKFILL_BATCH_SIZE)
+            )
+            notes = response.data
+            if not notes:
+                break
+            
+            # One embeddings request and one update per batch
+            embeddings = await embed_texts([note_search_text(note) for note in notes])
+            await execute_query(supabase.rpc("set_meeting_note_embeddings", {
+                "items": [
+                    {"id": note["id"], "embedding": embedding}
+                    for note, embedding in zip(notes, embeddings)
+                ]
+            }))
+            embedded += len(notes)
+        
+        logger.info(f"Backfilled embeddings for {embedded} meeting notes")
+        
+        return {"embedded": embedded}
+    except Exception as e:
+        logger.error(f"Failed to backfill meeting notes embeddings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# How long clients may reuse a meeting notes response without revalidating
+NOTES_CACHE_CONTROL = "private, max-age=30"
+
+def notes_etag(notes_row: Dict[str, Any], action_items: List[Dict[str, Any]]) -> str:
+    """Builds an ETag from the update times of a meeting's notes and action items."""
+    digest = hashlib.sha1(notes_row["updated_at"].encode())
+    for item in sorted(action_items, key=lambda item: item["id"]):
+        digest.update(f"|{item['id']}@{item.get('updated_at')}".encode())
+    return f'"{digest.hexdigest()}"'
+
+@router.get("/{notes_id}", response_model=MeetingNotes)
+async def get_meeting_notes(notes_id: str, request: Request, response: Response):
+    """
+    Retrieve meeting notes by ID.
+    
+    Responses carry an ETag; a request whose If-None-Match matches it gets
+    an empty 304 Not Modified.
+    """
+    try:
+        # Fetch meeting notes and their action items together
+        notes_row, action_items = await asyncio.gather(
+            fetch_notes_row(notes_id),
+            fetch_action_items(notes_id)
+        )
+            
+        if not notes_row:
+            raise HTTPException(status_code=404, detail="Meeting notes not found")
         
-        # Combine data
-        notes_data["action_items"] = action_items
+        etag = notes_etag(notes_row, action_items)
+        cache_headers = {"ETag": etag, "Cache-Control": NOTES_CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=cache_headers)
+        response.headers.update(cache_headers)
         
         # Log the retrieval
         logger.info(f"Retrieved meeting notes {notes_id}")
         
-        return MeetingNotes(**notes_data)
+        # Validate the row as-is; Pydantic parses the ISO date strings itself.
+        # The cached row is not mutated, as the action items go in a new dict.
+        return MeetingNotes.model_validate({**notes_row, "action_items": action_items})
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -272,58 +669,38 @@ async def get_client_meeting_history(
     Retrieve meeting history for a client.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Build query
-        query = supabase.table("meeting_notes").select("*").eq("client_id", client_id)
-        
-        # Apply filters if provided
-        if project_id:
-            query = query.eq("project_id", project_id)
-        if meeting_type:
-            query = query.eq("meeting_type", meeting_type)
-            
-        # Apply pagination
-        query = query.order("date", desc=True).range(offset, offset + limit - 1)
-        
-        # Execute query
-        response = query.execute()
+        supabase = get_supabase()
+        
+        # Fetch the page and the total count for pagination in one query
+        response = await execute_query(supabase.rpc("list_client_meetings", {
+            "p_client_id": client_id,
+            "p_project_id": project_id,
+            "p_meeting_type": meeting_type.value if meeting_type else None,
+            "p_limit": limit,
+            "p_offset": offset
+        }))
         meetings = response.data
+        total = meetings[0]["total"] if meetings else 0
         
-        # Get total count for pagination
-        count_query = supabase.table("meeting_notes").select("id", count="exact").eq("client_id", client_id)
-        if project_id:
-            count_query = count_query.eq("project_id", project_id)
-        if meeting_type:
-            count_query = count_query.eq("meeting_type", meeting_type)
-            
-        count_response = count_query.execute()
-        total = count_response.count
+        # Count the action items of every meeting on the page by status in
+        # one query instead of one query per meeting
+        action_item_counts = defaultdict(dict)
+        if meetings:
+            rows = await get_pool().fetch(ACTION_ITEM_COUNTS_QUERY, [meeting["id"] for meeting in meetings])
+            for row in rows:
+                action_item_counts[row["notes_id"]][row["status"]] = row["count"]
         
-        # For each meeting, get action item counts
         formatted_meetings = []
         for meeting in meetings:
-            # Get action items for this meeting
-            action_items_query = supabase.table("action_items")\
-                .select("id, status")\
-                .eq("notes_id", meeting["id"])\
-                .execute()
-                
-            action_items = action_items_query.data
-            
-            # Count completed action items
-            completed_count = sum(1 for item in action_items if item["status"] == ActionItemStatus.COMPLETED)
+            status_counts = action_item_counts[meeting["id"]]
             
             formatted_meetings.append({
                 "id": meeting["id"],
                 "title": meeting["title"],
                 "meeting_type": meeting["meeting_type"],
                 "date": meeting["date"],
-                "action_items_count": len(action_items),
-                "action_items_completed": completed_count,
+                "action_items_count": sum(status_counts.values()),
+                "action_items_completed": status_counts.get(ActionItemStatus.COMPLETED.value, 0),
                 "summary": meeting.get("summary", "")[:100] + "..." if meeting.get("summary", "") else ""
             })
         
@@ -353,64 +730,27 @@ async def update_action_item(
     Update the status of an action item.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Check if meeting notes exist
-        notes_response = supabase.table("meeting_notes")\
-            .select("id")\
-            .eq("id", notes_id)\
-            .single()\
-            .execute()
-            
-        if not notes_response.data:
+        if not await fetch_notes_row(notes_id):
             raise HTTPException(status_code=404, detail="Meeting notes not found")
         
-        # Check if action item exists
-        action_response = supabase.table("action_items")\
-            .select("*")\
-            .eq("id", action_id)\
-            .eq("notes_id", notes_id)\
-            .single()\
-            .execute()
-            
-        if not action_response.data:
+        # Update action item, keeping its notes unless new ones are given; the
+        # updated row comes back in the same call, and no row means the
+        # action item does not exist
+        action_data = await get_pool().fetchval(
+            UPDATE_ACTION_ITEM_QUERY,
+            action_id,
+            notes_id,
+            status.value,
+            notes,
+            datetime.now(timezone.utc)
+        )
+        if not action_data:
             raise HTTPException(status_code=404, detail="Action item not found")
         
-        # Prepare update data
-        update_data = {
-            "status": status,
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        # Add notes if provided
-        if notes is not None:
-            update_data["notes"] = notes
-        
-        # Update action item
-        supabase.table("action_items")\
-            .update(update_data)\
-            .eq("id", action_id)\
-            .eq("notes_id", notes_id)\
-            .execute()
-        
         # Log the update
         logger.info(f"Updated action item {action_id} in meeting notes {notes_id} to status {status}")
         
-        # Get the updated action item
-        updated_action = supabase.table("action_items")\
-            .select("*")\
-            .eq("id", action_id)\
-            .single()\
-            .execute()
-            
-        # Format due date if present
-        action_data = updated_action.data
-        if action_data.get("due_date"):
-            action_data["due_date"] = datetime.fromisoformat(action_data["due_date"].replace("Z", "+00:00"))
-        
         return {
             "notes_id": notes_id,
             "action_id": action_id,
@@ -435,23 +775,15 @@ async def add_action_item(
     Add a new action item to meeting notes.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
+        supabase = get_supabase()
         
         # Check if meeting notes exist
-        notes_response = supabase.table("meeting_notes")\
-            .select("id")\
-            .eq("id", notes_id)\
-            .single()\
-            .execute()
-            
-        if not notes_response.data:
+        if not await fetch_notes_row(notes_id):
             raise HTTPException(status_code=404, detail="Meeting notes not found")
         
         # Generate a unique ID for the action item
-        action_id = f"action-{uuid.uuid4().hex[:8]}"
+        action_id = f"action-{secrets.token_hex(4)}"
+        now_iso = datetime.now(timezone.utc).isoformat()
         
         # Prepare action item data
         action_data = {
@@ -460,8 +792,8 @@ async def add_action_item(
             "description": description,
             "assigned_to": assigned_to,
             "status": ActionItemStatus.PENDING,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now_iso,
+            "updated_at": now_iso
         }
         
         # Add due date if provided
@@ -469,7 +801,7 @@ async def add_action_item(
             action_data["due_date"] = due_date.isoformat()
         
         # Insert action item into database
-        supabase.table("action_items").insert(action_data).execute()
+        await execute_query(supabase.table("action_items").insert(action_data, returning="minimal"))
         
         # Log the creation
         logger.info(f"Added action item {action_id} to meeting notes {notes_id}")
@@ -482,7 +814,7 @@ async def add_action_item(
             "assigned_to": assigned_to,
             "due_date": due_date,
             "status": ActionItemStatus.PENDING,
-            "created_at": datetime.now().isoformat()
+            "created_at": now_iso
         }
     except HTTPException as he:
         raise he
@@ -490,6 +822,48 @@ async def add_action_item(
         logger.error(f"Failed to add action item to meeting notes {notes_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{notes_id}/action-items/bulk")
+async def add_action_items_bulk(notes_id: str, items: List[ActionItemCreate]):
+    """
+    Add several action items to meeting notes in a single insert.
+    """
+    try:
+        supabase = get_supabase()
+        
+        # Check if meeting notes exist
+        if not await fetch_notes_row(notes_id):
+            raise HTTPException(status_code=404, detail="Meeting notes not found")
+        
+        if not items:
+            return []
+        
+        now_iso = datetime.now(timezone.utc).isoformat()
+        action_items_data = [
+            {
+                "id": f"action-{secrets.token_hex(4)}",
+                "notes_id": notes_id,
+                "description": item.description,
+                "assigned_to": item.assigned_to,
+                "due_date": item.due_date.isoformat() if item.due_date else None,
+                "status": ActionItemStatus.PENDING,
+                "notes": item.notes,
+                "created_at": now_iso,
+                "updated_at": now_iso
+            }
+            for item in items
+        ]
+        
+        await execute_query(supabase.table("action_items").insert(action_items_data, returning="minimal"))
+        
+        logger.info(f"Added {len(action_items_data)} action items to meeting notes {notes_id}")
+        
+        return action_items_data
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Failed to add action items to meeting notes {notes_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/{notes_id}/share")
 async def share_meeting_notes(
     notes_id: str,
@@ -501,45 +875,51 @@ async def share_meeting_notes(
     Share meeting notes with specified recipients.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Check if meeting notes exist
-        notes_response = supabase.table("meeting_notes")\
-            .select("*")\
-            .eq("id", notes_id)\
-            .single()\
-            .execute()
+        supabase = get_supabase()
+        
+        # Check if meeting notes exist, fetching action items alongside if
+        # they will go into an email
+        notes_query = fetch_notes_row(notes_id)
+        if include_action_items and recipients:
+            notes_data, action_items = await asyncio.gather(
+                notes_query,
+                fetch_action_items(notes_id)
+            )
+        else:
+            notes_data = await notes_query
+            action_items = []
             
-        if not notes_response.data:
+        if not notes_data:
             raise HTTPException(status_code=404, detail="Meeting notes not found")
         
-        notes_data = notes_response.data
+        # With nobody to share with there is no link to create or email to send
+        if not recipients:
+            return {
+                "notes_id": notes_id,
+                "shared_with": [],
+                "shared_at": None,
+                "access_link": None,
+                "share_id": None,
+                "expires_at": None
+            }
         
-        # Get action items if requested
-        action_items = []
-        if include_action_items:
-            action_items_response = supabase.table("action_items")\
-                .select("*")\
-                .eq("notes_id", notes_id)\
-                .execute()
-            action_items = action_items_response.data
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        expires_iso = (now + timedelta(days=30)).isoformat()
         
         # Generate a unique share ID
-        share_id = f"share-{uuid.uuid4().hex[:8]}"
+        share_id = f"share-{secrets.token_hex(4)}"
         
         # Create a shareable link with token
-        access_token = uuid.uuid4().hex
+        access_token = secrets.token_urlsafe(24)
         access_link = f"https://intellisync-crm.com/shared/notes/{notes_id}?token={access_token}"
         
         # Prepare share data
         share_data = {
             "id": share_id,
             "notes_id": notes_id,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(days=30)).isoformat(),  # Expires in 30 days
+            "created_at": now_iso,
+            "expires_at": expires_iso,  # Expires in 30 days
             "access_token": access_token,
             "recipients": recipients,
             "include_action_items": include_action_items,
@@ -548,45 +928,20 @@ async def share_meeting_notes(
         }
         
         # Store share data in database
-        supabase.table("shared_notes").insert(share_data).execute()
+        await execute_query(supabase.table("shared_notes").insert(share_data, returning="minimal"))
         
         # Format meeting date
         meeting_date = datetime.fromisoformat(notes_data["date"].replace("Z", "+00:00"))
         formatted_date = meeting_date.strftime("%B %d, %Y at %I:%M %p")
         
-        # Create email content in a simple way
-        email_content = "<h2>Meeting Notes: " + notes_data['title'] + "</h2>"
-        email_content += "<p>Meeting Date: " + formatted_date + "</p>"
-        email_content += "<p>Meeting Type: " + notes_data['meeting_type'] + "</p>"
-        
-        email_content += "<h3>Summary</h3>"
-        email_content += "<p>" + notes_data.get('summary', 'No summary available') + "</p>"
-        
-        email_content += "<h3>Key Points</h3>"
-        email_content += "<ul>"
-        for point in notes_data.get('key_points', []):
-            email_content += "<li>" + point + "</li>"
-        email_content += "</ul>"
-        
-        # Add action items if requested
-        if include_action_items and action_items:
-            email_content += "<h3>Action Items</h3>"
-            email_content += "<ul>"
-            for item in action_items:
-                due_date = ""
-                if item.get("due_date"):
-                    due_date_obj = datetime.fromisoformat(item['due_date'].replace('Z', '+00:00'))
-                    due_date = " (Due: " + due_date_obj.strftime('%B %d, %Y') + ")"
-                    
-                email_content += "<li><strong>" + item['description'] + "</strong> - Assigned to: " + item['assigned_to'] + due_date + " - Status: " + item['status'] + "</li>"
-            email_content += "</ul>"
-        
-        # Add access link
-        email_content += "<p>You can view the complete meeting notes here: <a href=\"" + access_link + "\">" + notes_data['title'] + " - Meeting Notes</a></p>"
-        
-        # Add optional message
-        if message:
-            email_content += "<p>Message from sender: " + message + "</p>"
+        email_content = SHARE_EMAIL_TEMPLATE.render(
+            notes=notes_data,
+            formatted_date=formatted_date,
+            include_action_items=include_action_items,
+            action_items=action_items,
+            access_link=access_link,
+            message=message
+        )
         
         # In a real implementation, we would send emails to recipients here
         # For now, we'll just log the action
@@ -599,10 +954,10 @@ async def share_meeting_notes(
         return {
             "notes_id": notes_id,
             "shared_with": recipients,
-            "shared_at": datetime.now().isoformat(),
+            "shared_at": now_iso,
             "access_link": access_link,
             "share_id": share_id,
-            "expires_at": (datetime.now() + timedelta(days=30)).isoformat()
+            "expires_at": expires_iso
         }
     except HTTPException as he:
         raise he
@@ -610,162 +965,67 @@ async def share_meeting_notes(
         logger.error(f"Failed to share meeting notes {notes_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/search")
-async def search_meeting_notes(
-    query: str,
-    client_id: Optional[str] = None,
-    project_id: Optional[str] = None,
-    meeting_type: Optional[MeetingType] = None,
-    date_from: Optional[datetime] = None,
-    date_to: Optional[datetime] = None
-):
+def render_export_document(
+    notes_data: Dict[str, Any],
+    action_items: List[Dict[str, Any]],
+    generated_at: datetime
+) -> Iterator[str]:
     """
-    Search meeting notes by content.
+    Renders the HTML export of meeting notes piece by piece, so it can be
+    streamed without holding the whole document in memory.
+    """
+    meeting_date = datetime.fromisoformat(notes_data["date"].replace("Z", "+00:00"))
+    return EXPORT_TEMPLATE.generate(
+        notes=notes_data,
+        action_items=action_items,
+        formatted_date=meeting_date.strftime("%B %d, %Y at %I:%M %p"),
+        generated_at=generated_at
+    )
+
+@router.get("/{notes_id}/export/html")
+async def stream_meeting_notes_html(notes_id: str):
+    """
+    Stream meeting notes as a standalone HTML document.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
-        # Initialize OpenAI client for text embeddings
-        openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        
-        # Normalize search query
-        normalized_query = query.lower().strip()
-        
-        # Build base query to get all meeting notes that match filters
-        base_query = supabase.table("meeting_notes").select("*")
-        
-        # Apply filters if provided
-        if client_id:
-            base_query = base_query.eq("client_id", client_id)
-        if project_id:
-            base_query = base_query.eq("project_id", project_id)
-        if meeting_type:
-            base_query = base_query.eq("meeting_type", meeting_type)
-        if date_from:
-            base_query = base_query.gte("date", date_from.isoformat())
-        if date_to:
-            base_query = base_query.lte("date", date_to.isoformat())
-            
-        # Execute the query
-        response = base_query.execute()
-        notes = response.data
-        
-        # If no notes found, return empty results
-        if not notes:
-            return {
-                "query": query,
-                "results": [],
-                "total": 0
-            }
-        
-        # For each note, compute relevance score based on text matching
-        results = []
-        for note in notes:
-            # Combine all text fields for searching
-            note_text = (
-                note.get("title", "") + " " +
-                note.get("summary", "") + " " +
-                " ".join(note.get("key_points", [])) + " " +
-                " ".join(note.get("decisions", [])) + " " +
-                " ".join(note.get("topics_discussed", []))
-            ).lower()
-            
-            # Simple text matching for relevance score
-            # In a production system, we would use embeddings and vector search
-            relevance_score = 0.0
-            matches = []
-            
-            # Check title match (highest weight)
-            if normalized_query in note.get("title", "").lower():
-                relevance_score += 0.5
-                matches.append({
-                    "field": "title",
-                    "context": note.get("title", "")
-                })
-            
-            # Check summary match
-            summary = note.get("summary", "")
-            if normalized_query in summary.lower():
-                relevance_score += 0.3
-                # Get context around the match
-                start_idx = max(0, summary.lower().find(normalized_query) - 20)
-                end_idx = min(len(summary), summary.lower().find(normalized_query) + len(normalized_query) + 20)
-                context = "..." + summary[start_idx:end_idx] + "..."
-                matches.append({
-                    "field": "summary",
-                    "context": context
-                })
-            
-            # Check key points match
-            for i, point in enumerate(note.get("key_points", [])):
-                if normalized_query in point.lower():
-                    relevance_score += 0.2
-                    matches.append({
-                        "field": "key_points",
-                        "context": point
-                    })
-            
-            # Check decisions match
-            for i, decision in enumerate(note.get("decisions", [])):
-                if normalized_query in decision.lower():
-                    relevance_score += 0.2
-                    matches.append({
-                        "field": "decisions",
-                        "context": decision
-                    })
-            
-            # Check topics match
-            for i, topic in enumerate(note.get("topics_discussed", [])):
-                if normalized_query in topic.lower():
-                    relevance_score += 0.1
-                    matches.append({
-                        "field": "topics_discussed",
-                        "context": topic
-                    })
-            
-            # If we have matches, add to results
-            if relevance_score > 0:
-                # Format date
-                note_date = datetime.fromisoformat(note["date"].replace("Z", "+00:00"))
-                
-                results.append({
-                    "id": note["id"],
-                    "title": note["title"],
-                    "meeting_type": note["meeting_type"],
-                    "date": note_date.isoformat(),
-                    "relevance_score": min(1.0, relevance_score),  # Cap at 1.0
-                    "matches": matches
-                })
-        
-        # Sort results by relevance score (highest first)
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
+        notes_data, action_items = await asyncio.gather(
+            fetch_notes_row(notes_id),
+            fetch_action_items(notes_id)
+        )
         
-        # Log the search
-        logger.info(f"Searched meeting notes for '{query}' with {len(results)} results")
+        if not notes_data:
+            raise HTTPException(status_code=404, detail="Meeting notes not found")
         
-        return {
-            "query": query,
-            "results": results,
-            "total": len(results)
-        }
+        return StreamingResponse(
+            render_export_document(notes_data, action_items, datetime.now(timezone.utc)),
+            media_type="text/html"
+        )
+    except HTTPException as he:
+        raise he
     except Exception as e:
-        logger.error(f"Failed to search meeting notes: {str(e)}")
+        logger.error(f"Failed to render meeting notes {notes_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Exports by (notes ID, format, ETag of the notes and action items). An
+# unchanged meeting re-exported in the same format reuses the earlier export
+# while it has at least six of its seven days left.
+export_cache = TTLCache(ttl_seconds=86400, max_entries=1024)
+
+async def store_notes_export(export_data: Dict[str, Any], cache_key: tuple, export_result: Dict[str, Any]) -> None:
+    """Insert an export record into notes_exports, caching the export only once it is stored"""
+    try:
+        await execute_query(get_supabase().table("notes_exports").insert(export_data, returning="minimal"))
+    except Exception as e:
+        logger.error(f"Failed to store export {export_data.get('id')}: {str(e)}")
+        return
+    export_cache.set(cache_key, export_result)
+
 @router.post("/{notes_id}/export")
-async def export_meeting_notes(notes_id: str, format: str = "pdf"):
+async def export_meeting_notes(notes_id: str, background_tasks: BackgroundTasks, format: str = "pdf"):
     """
     Export meeting notes in the specified format.
     """
     try:
-        # Initialize Supabase client
-        supabase_url = os.environ.get("SUPABASE_URL")
-        supabase_key = os.environ.get("SUPABASE_KEY")
-        supabase = create_client(supabase_url, supabase_key)
-        
         # Validate format
         valid_formats = ["pdf", "docx", "html", "txt"]
         if format.lower() not in valid_formats:
@@ -774,153 +1034,29 @@ async def export_meeting_notes(notes_id: str, format: str = "pdf"):
                 detail=f"Invalid format. Supported formats are: {', '.join(valid_formats)}"
             )
         
-        # Check if meeting notes exist
-        notes_response = supabase.table("meeting_notes")\
-            .select("*")\
-            .eq("id", notes_id)\
-            .single()\
-            .execute()
-            
-        if not notes_response.data:
+        # Check if meeting notes exist, fetching their action items alongside
+        # to tell whether the content changed since an earlier export
+        notes_data, action_items = await asyncio.gather(
+            fetch_notes_row(notes_id),
+            fetch_action_items(notes_id)
+        )
+        if not notes_data:
             raise HTTPException(status_code=404, detail="Meeting notes not found")
         
-        notes_data = notes_response.data
+        cache_key = (notes_id, format.lower(), notes_etag(notes_data, action_items))
+        cached_export = export_cache.get(cache_key)
+        if cached_export is not None:
+            return cached_export
         
-        # Get action items for these notes
-        action_items_response = supabase.table("action_items")\
-            .select("*")\
-            .eq("notes_id", notes_id)\
-            .execute()
-            
-        action_items = action_items_response.data
-        
-        # Format meeting date
-        meeting_date = datetime.fromisoformat(notes_data["date"].replace("Z", "+00:00"))
-        formatted_date = meeting_date.strftime("%B %d, %Y at %I:%M %p")
+        now = datetime.now(timezone.utc)
+        now_iso = now.isoformat()
+        expires_iso = (now + timedelta(days=7)).isoformat()
         
         # Generate a unique export ID
-        export_id = f"export-{uuid.uuid4().hex[:8]}"
-        
-        # Create content for export
-        html_content = textwrap.dedent(f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Meeting Notes: {notes_data['title']}</title>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
-                    h1, h2, h3 {{ color: #333; }}
-                    .header {{ border-bottom: 1px solid #ddd; padding-bottom: 10px; margin-bottom: 20px; }}
-                    .metadata {{ color: #666; font-size: 0.9em; }}
-                    .section {{ margin-bottom: 20px; }}
-                    .action-item {{ background-color: #f9f9f9; padding: 10px; margin-bottom: 10px; border-left: 3px solid #ddd; }}
-                    .action-item.pending {{ border-left-color: #f0ad4e; }}
-                    .action-item.in_progress {{ border-left-color: #5bc0de; }}
-                    .action-item.completed {{ border-left-color: #5cb85c; }}
-                    .action-item.blocked {{ border-left-color: #d9534f; }}
-                    .footer {{ margin-top: 30px; border-top: 1px solid #ddd; padding-top: 10px; font-size: 0.8em; color: #666; }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1>Meeting Notes: {notes_data['title']}</h1>
-                    <div class="metadata">
-                        <p>Date: {formatted_date}</p>
-                        <p>Meeting Type: {notes_data['meeting_type']}</p>
-                        <p>Duration: {notes_data.get('duration_minutes', 0)} minutes</p>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2>Summary</h2>
-                    <p>{notes_data.get('summary', 'No summary available')}</p>
-                </div>
-                
-                <div class="section">
-                    <h2>Key Points</h2>
-                    <ul>
-        """)
-        # Append key points
-        for point in notes_data.get('key_points', []):
-            html_content += f"            <li>{point}</li>\n"
-        html_content += textwrap.dedent("""
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h2>Decisions</h2>
-                    <ul>
-        """)
-        # Append decisions
-        if notes_data.get('decisions', []):
-            for decision in notes_data.get('decisions', []):
-                html_content += f"            <li>{decision}</li>\n"
-        else:
-            html_content += "            <li>No decisions recorded</li>\n"
-        html_content += textwrap.dedent("""
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h2>Topics Discussed</h2>
-                    <ul>
-        """)
-        # Append topics discussed
-        if notes_data.get('topics_discussed', []):
-            for topic in notes_data.get('topics_discussed', []):
-                html_content += f"            <li>{topic}</li>\n"
-        else:
-            html_content += "            <li>No topics recorded</li>\n"
-        html_content += textwrap.dedent("""
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h2>Action Items</h2>
-        """)
-        # Append action items
-        if action_items:
-            for item in action_items:
-                status = item.get("status", "pending")
-                due_date = ""
-                if item.get("due_date"):
-                    due_date_obj = datetime.fromisoformat(item['due_date'].replace('Z', '+00:00'))
-                    due_date = f" (Due: {due_date_obj.strftime('%B %d, %Y')})"
-                html_content += textwrap.dedent(f"""
-                    <div class="action-item {status}">
-                        <strong>{item['description']}</strong><br>
-                        Assigned to: {item['assigned_to']}{due_date}<br>
-                        Status: {status}
-                        {f'<br>Notes: {item.get("notes", "")}' if item.get("notes") else ''}
-                    </div>
-                """)
-        else:
-            html_content += "        <p>No action items recorded</p>\n"
-        html_content += textwrap.dedent("""
-                <div class="section">
-                    <h2>Attendees</h2>
-                    <ul>
-        """)
-        # Append attendees
-        if notes_data.get('attendees', []):
-            for attendee in notes_data.get('attendees', []):
-                html_content += f"            <li>{attendee.get('name', 'Unknown')} ({attendee.get('email', 'No email')}) - {attendee.get('role', 'Participant')}</li>\n"
-        else:
-            html_content += "            <li>No attendees recorded</li>\n"
-        html_content += textwrap.dedent(f"""
-                    </ul>
-                </div>
-                
-                <div class="footer">
-                    <p>Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')} by Intellisync CRM</p>
-                    <p>Meeting ID: {notes_id}</p>
-                </div>
-            </body>
-            </html>
-        """)
+        export_id = f"export-{secrets.token_hex(4)}"
         
         # Generate a unique filename
-        filename = f"{notes_data['title'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.{format.lower()}"
+        filename = f"{notes_data['title'].replace(' ', '_')}_{now.strftime('%Y%m%d')}.{format.lower()}"
         
         # Create export record in database
         export_data = {
@@ -928,28 +1064,31 @@ async def export_meeting_notes(notes_id: str, format: str = "pdf"):
             "notes_id": notes_id,
             "format": format.lower(),
             "filename": filename,
-            "created_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(days=7)).isoformat(),  # Expires in 7 days
+            "created_at": now_iso,
+            "expires_at": expires_iso,  # Expires in 7 days
             "status": "completed"
         }
         
-        # Store export record in database
-        supabase.table("notes_exports").insert(export_data).execute()
-        
-        # In a real implementation, we would upload the file to a storage service
-        # and generate a signed URL for download. For now, we'll simulate this.
+        # In a real implementation, we would upload the document rendered by
+        # render_export_document to a storage service and generate a signed URL
+        # for download. For now, we'll simulate this.
         download_url = f"https://intellisync-crm.com/api/downloads/{export_id}/{filename}"
         
         # Log the export
         logger.info(f"Exported meeting notes {notes_id} to {format} format")
         
-        return {
+        export_result = {
             "notes_id": notes_id,
             "format": format.lower(),
             "filename": filename,
             "download_url": download_url,
-            "expires_at": (datetime.now() + timedelta(days=7)).isoformat()
+            "expires_at": expires_iso
         }
+        
+        # Store the export record after the response has been sent
+        background_tasks.add_task(store_notes_export, export_data, cache_key, export_result)
+        
+        return export_result
     except HTTPException as he:
         raise he
     except Exception as e:
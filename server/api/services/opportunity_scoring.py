@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
 
-router = APIRouter(prefix="/score", tags=["opportunity-scoring"])
+router = APIRouter(prefix="/score", tags=["opportunity-scoring"], default_response_class=ORJSONResponse)
 
 class ImpactLevel(str, Enum):
     HIGH = "high"
@@ -18,6 +19,8 @@ class ResourceType(str, Enum):
     PROJECT_MANAGER = "project_manager"
 
 class ResourceRequirement(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     type: ResourceType
     hours: float
     skills: List[str]
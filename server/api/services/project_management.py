@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from enum import Enum
 
-router = APIRouter(prefix="/projects", tags=["project-management"])
+router = APIRouter(prefix="/projects", tags=["project-management"], default_response_class=ORJSONResponse)
 
 class ProjectStatus(str, Enum):
     PLANNING = "planning"
@@ -53,6 +54,8 @@ class Scope(BaseModel):
     resources: Resources
 
 class Task(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     id: str
     project_id: str
     title: str
@@ -67,6 +70,8 @@ class Task(BaseModel):
     actual_hours: float
 
 class Milestone(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     id: str
     project_id: str
     title: str
@@ -77,6 +82,8 @@ class Milestone(BaseModel):
     dependencies: List[str]
 
 class Resource(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     id: str
     type: ResourceType
     name: str
@@ -98,6 +105,8 @@ class ProjectCreate(BaseModel):
     scope: Scope
 
 class Project(BaseModel):
+    model_config = ConfigDict(use_enum_values=True)
+    
     id: str
     client_id: str
     name: str
@@ -162,22 +171,22 @@ async def get_client_projects(client_id: str):
                 {
                     "id": "project-123",
                     "name": "Website Redesign",
-                    "status": ProjectStatus.ACTIVE,
+                    "status": ProjectStatus.ACTIVE.value,
                     "progress": 45.0,
-                    "health": HealthStatus.GREEN,
+                    "health": HealthStatus.GREEN.value,
                     "tasks": [
                         {
                             "id": "task-1",
                             "title": "Design Homepage",
-                            "status": TaskStatus.COMPLETED,
-                            "priority": TaskPriority.HIGH,
+                            "status": TaskStatus.COMPLETED.value,
+                            "priority": TaskPriority.HIGH.value,
                             "progress": 100.0
                         },
                         {
                             "id": "task-2",
                             "title": "Implement User Authentication",
-                            "status": TaskStatus.IN_PROGRESS,
-                            "priority": TaskPriority.HIGH,
+                            "status": TaskStatus.IN_PROGRESS.value,
+                            "priority": TaskPriority.HIGH.value,
                             "progress": 60.0
                         }
                     ],
@@ -185,13 +194,13 @@ async def get_client_projects(client_id: str):
                         {
                             "id": "milestone-1",
                             "title": "Design Approval",
-                            "status": MilestoneStatus.COMPLETED,
+                            "status": MilestoneStatus.COMPLETED.value,
                             "due_date": datetime.now() - timedelta(days=7)
                         },
                         {
                             "id": "milestone-2",
                             "title": "Beta Launch",
-                            "status": MilestoneStatus.PENDING,
+                            "status": MilestoneStatus.PENDING.value,
                             "due_date": datetime.now() + timedelta(days=14)
                         }
                     ],
@@ -285,8 +294,8 @@ async def add_project_task(
             "project_id": id,
             "title": title,
             "description": description,
-            "status": TaskStatus.PENDING,
-            "priority": priority,
+            "status": TaskStatus.PENDING.value,
+            "priority": priority.value,
             "assigned_to": assigned_to,
             "deadline": deadline,
             "dependencies": dependencies or [],
@@ -311,7 +320,7 @@ async def update_task(
     try:
         updates = {}
         if status is not None:
-            updates["status"] = status
+            updates["status"] = status.value
         if progress is not None:
             updates["progress"] = progress
         if actual_hours is not None:
@@ -344,7 +353,7 @@ async def add_project_milestone(
             "title": title,
             "description": description,
             "due_date": due_date,
-            "status": MilestoneStatus.PENDING,
+            "status": MilestoneStatus.PENDING.value,
             "deliverables": deliverables,
             "dependencies": dependencies or [],
             "created_at": datetime.now()
@@ -363,7 +372,7 @@ async def update_milestone(
     try:
         return {
             "id": milestone_id,
-            "status": status,
+            "status": status.value,
             "updated_at": datetime.now()
         }
     except Exception as e:
@@ -386,7 +395,7 @@ async def allocate_resource(
         return {
             "id": "resource-123",
             "project_id": id,
-            "type": resource_type,
+            "type": resource_type.value,
             "name": name,
             "skills": skills,
             "availability": availability,
@@ -428,7 +437,7 @@ async def get_projects_dashboard():
                 {
                     "id": "project-456",
                     "name": "Mobile App Development",
-                    "health": HealthStatus.RED,
+                    "health": HealthStatus.RED.value,
                     "reason": "Resource shortage and timeline slippage"
                 }
             ],
@@ -445,7 +454,7 @@ async def perform_project_health_check(id: str):
     try:
         return {
             "project_id": id,
-            "health_status": HealthStatus.YELLOW,
+            "health_status": HealthStatus.YELLOW.value,
             "issues_found": [
                 {
                     "type": "schedule",
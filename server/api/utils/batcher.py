@@ -0,0 +1,123 @@
+"""
+Request coalescing for concurrent callers.
+
+`AsyncBatcher` collects items submitted within a short window into a batch
+and hands the whole batch to a single handler call, so fixed per-call
+overhead is paid once per batch instead of once per request.
+`BinScheduler` keeps a separate batcher per prompt-length bin, so short
+prompts are never batched behind long ones.
+"""
+
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Set
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+class AsyncBatcher:
+    """
+    Coalesces concurrent `submit` calls into batches for one handler call.
+
+    The handler receives the submitted items in order and must return one
+    result per item, in the same order. A result that is an `Exception` is
+    raised to that item's caller only, so one failed item does not fail the
+    rest of its batch.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 16,
+        max_wait_ms: float = 20
+    ):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result from the next batch."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Dispatch without waiting so the next batch can start filling
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[tuple]) -> None:
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as e:
+            logger.error(f"Batch of {len(batch)} items failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        # Fail callers left without a result instead of leaving them waiting
+        if len(results) < len(batch):
+            message = f"Batch handler returned {len(results)} results for {len(batch)} items"
+            logger.error(message)
+            for _, future in batch[len(results):]:
+                if not future.done():
+                    future.set_exception(RuntimeError(message))
+
+def prompt_bin(prompt_tokens: int, bins: int = 3, base_tokens: int = 256) -> int:
+    """Returns the length bin for a prompt: 0 below 2 * base_tokens, then one bin per doubling."""
+    if prompt_tokens < base_tokens * 2:
+        return 0
+    return min(bins - 1, int(math.log2(prompt_tokens / base_tokens)))
+
+class BinScheduler:
+    """
+    Routes items to per-bin `AsyncBatcher`s sharing one handler.
+
+    `max_batch_sizes` gives the batch size of each bin, usually larger for
+    the bins holding shorter prompts.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_sizes: Sequence[int] = (32, 16, 8),
+        max_wait_ms: float = 20
+    ):
+        self.batchers = [
+            AsyncBatcher(handler, max_batch=max_batch, max_wait_ms=max_wait_ms)
+            for max_batch in max_batch_sizes
+        ]
+
+    async def submit(self, item: Any, prompt_tokens: int) -> Any:
+        """Queue an item on the batcher for its prompt-length bin."""
+        return await self.batchers[prompt_bin(prompt_tokens, bins=len(self.batchers))].submit(item)
@@ -0,0 +1,63 @@
+"""
+Direct PostgreSQL access for hot read paths.
+
+Holds a process-wide asyncpg pool connected with POSTGRES_DSN, so hot
+queries skip the PostgREST HTTP hop used by the Supabase client.
+"""
+
+from typing import Optional
+import json
+import logging
+import asyncpg
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[asyncpg.Pool] = None
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    # Decode json/jsonb columns to Python objects, matching the Supabase client
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+
+async def init_pool() -> Optional[asyncpg.Pool]:
+    """Create the shared pool if it does not exist yet. Safe to call repeatedly."""
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    settings = get_settings()
+    dsn = settings.postgres_dsn
+    if not dsn:
+        logger.warning("POSTGRES_DSN is not set; direct database access is disabled")
+        return None
+
+    _pool = await asyncpg.create_pool(
+        dsn=dsn,
+        min_size=10,
+        max_size=50,
+        max_inactive_connection_lifetime=300,
+        command_timeout=60,
+        statement_cache_size=settings.postgres_statement_cache_size,
+        init=_init_connection
+    )
+    logger.info("Created PostgreSQL connection pool")
+    return _pool
+
+async def close_pool() -> None:
+    """Close the shared pool if it is open."""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def get_pool() -> asyncpg.Pool:
+    """Return the shared pool, failing loudly if it was never initialized."""
+    if _pool is None:
+        raise RuntimeError("PostgreSQL pool is not initialized; set POSTGRES_DSN")
+    return _pool
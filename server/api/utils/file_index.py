@@ -0,0 +1,114 @@
+"""
+Metadata index for uploaded files.
+
+Maps (project_id, file_id) to the stored filename in a small SQLite
+database, so file lookups are an indexed read instead of a scan of the
+project directory.
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+_db: Optional[aiosqlite.Connection] = None
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    project_id TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    category TEXT,
+    visibility TEXT,
+    tags TEXT,
+    PRIMARY KEY (project_id, file_id)
+)
+"""
+
+async def open_index(path: str) -> aiosqlite.Connection:
+    """Open the shared index connection if it is not open yet. Safe to call repeatedly."""
+    global _db
+    if _db is not None:
+        return _db
+
+    _db = await aiosqlite.connect(path)
+    _db.row_factory = aiosqlite.Row
+    # WAL lets lookups proceed while an upload is being recorded
+    await _db.execute("PRAGMA journal_mode=WAL")
+    await _db.execute(SCHEMA)
+    await _db.commit()
+    logger.info(f"Opened file index at {path}")
+    return _db
+
+async def close_index() -> None:
+    """Close the shared index connection if it is open."""
+    global _db
+    if _db is not None:
+        await _db.close()
+        _db = None
+
+def get_index() -> aiosqlite.Connection:
+    """Return the shared index connection, failing loudly if it was never opened."""
+    if _db is None:
+        raise RuntimeError("File index is not open")
+    return _db
+
+async def add_file(record: Dict[str, Any]) -> None:
+    """Insert or replace the index entry for an uploaded file."""
+    db = get_index()
+    await db.execute(
+        "INSERT OR REPLACE INTO files "
+        "(project_id, file_id, filename, digest, size, mtime, category, visibility, tags) "
+        "VALUES (:project_id, :file_id, :filename, :digest, :size, :mtime, :category, :visibility, :tags)",
+        record
+    )
+    await db.commit()
+
+async def get_file(project_id: str, file_id: str) -> Optional[Dict[str, Any]]:
+    """Return the index entry for a file, or None if it is not indexed."""
+    async with get_index().execute(
+        "SELECT * FROM files WHERE project_id = ? AND file_id = ?",
+        (project_id, file_id)
+    ) as cursor:
+        row = await cursor.fetchone()
+    return dict(row) if row else None
+
+async def find_filename(project_id: str, file_id: str) -> Optional[str]:
+    """Return the stored filename for a file, or None if it is not indexed."""
+    async with get_index().execute(
+        "SELECT filename FROM files WHERE project_id = ? AND file_id = ?",
+        (project_id, file_id)
+    ) as cursor:
+        row = await cursor.fetchone()
+    return row["filename"] if row else None
+
+async def rename_file(project_id: str, file_id: str, filename: str) -> None:
+    """Point an indexed file at its new filename."""
+    db = get_index()
+    await db.execute(
+        "UPDATE files SET filename = ? WHERE project_id = ? AND file_id = ?",
+        (filename, project_id, file_id)
+    )
+    await db.commit()
+
+async def update_metadata(project_id: str, file_id: str, category: str, visibility: str, tags: str) -> None:
+    """Replace the category, visibility and tags of an indexed file."""
+    db = get_index()
+    await db.execute(
+        "UPDATE files SET category = ?, visibility = ?, tags = ? WHERE project_id = ? AND file_id = ?",
+        (category, visibility, tags, project_id, file_id)
+    )
+    await db.commit()
+
+async def remove_file(project_id: str, file_id: str) -> None:
+    """Drop a file from the index."""
+    db = get_index()
+    await db.execute(
+        "DELETE FROM files WHERE project_id = ? AND file_id = ?",
+        (project_id, file_id)
+    )
+    await db.commit()
@@ -0,0 +1,162 @@
+"""
+In-process cache for LLM completions.
+
+Completions are keyed on a hash of the canonicalized request (model,
+messages and sampling parameters), so identical prompts within the TTL
+are served from memory instead of calling the provider again.
+`SemanticCache` extends this to prompts that differ only slightly, by
+matching on the cosine similarity of their embeddings.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import functools
+import hashlib
+import json
+import time
+import numpy as np
+
+DEFAULT_TTL_SECONDS = 86400
+DEFAULT_MAX_ENTRIES = 1024
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a fixed TTL."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+class SemanticCache:
+    """Bounded cache of values keyed by embedding, matched on cosine similarity."""
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        ttl_seconds: float = 3600,
+        max_entries: int = DEFAULT_MAX_ENTRIES
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: list = []
+
+    @staticmethod
+    def _normalize(embedding: Any) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        self._entries = [entry for entry in self._entries if entry[0] >= now]
+
+    def get(self, embedding: Any) -> Optional[Any]:
+        """Return the value stored for the most similar embedding at or above the threshold."""
+        self._prune()
+        if not self._entries:
+            return None
+        query = self._normalize(embedding)
+        similarities = np.stack([entry[1] for entry in self._entries]) @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return self._entries[best][2]
+
+    def set(self, embedding: Any, value: Any) -> None:
+        self._entries.append((time.monotonic() + self.ttl_seconds, self._normalize(embedding), value))
+        if len(self._entries) > self.max_entries:
+            del self._entries[:len(self._entries) - self.max_entries]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+def async_ttl_cache(ttl_seconds: float, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    Memoize an async function's results for `ttl_seconds`, keyed on its arguments.
+
+    Intended for read-mostly endpoints whose payload changes rarely. Cache the
+    payload, not a Response object, since middleware may mutate response headers.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        cache = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (args, tuple(sorted(kwargs.items())))
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            result = await func(*args, **kwargs)
+            cache.set(key, result)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def make_cache_key(model: str, messages: Any, **params: Any) -> str:
+    """Builds a stable cache key from a completion request."""
+    canonical = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+completion_cache = TTLCache()
+
+async def cached_completion(
+    create: Callable[..., Awaitable[Any]],
+    model: str,
+    messages: Any,
+    cache: Optional[TTLCache] = None,
+    **params: Any
+) -> Any:
+    """
+    Return a cached completion for an identical request, calling `create` on a miss.
+
+    Args:
+        create: Completion coroutine function, e.g. `openai_client.chat_completion`
+        model: Model name
+        messages: Chat messages sent to the model
+        cache: Cache to use (defaults to the shared completion cache)
+        **params: Remaining completion parameters (max_tokens, temperature, ...)
+
+    Returns:
+        The completion response as returned by `create`
+    """
+    cache = cache if cache is not None else completion_cache
+    key = make_cache_key(model, messages, **params)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    response = await create(model=model, messages=messages, **params)
+    cache.set(key, response)
+    return response
@@ -0,0 +1,37 @@
+"""
+Process-wide configuration read once from the environment.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+import os
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    supabase_url: Optional[str]
+    supabase_key: Optional[str]
+    postgres_dsn: Optional[str]
+    # Use 0 behind a transaction-mode pooler such as PgBouncer, where
+    # prepared statements do not survive between transactions
+    postgres_statement_cache_size: int
+    # Minimum cosine similarity for reusing a cached discovery analysis, and
+    # how many analyses the semantic cache keeps
+    discovery_cache_threshold: float
+    discovery_cache_max_entries: int
+    # Internal nginx location serving UPLOAD_DIR; when set, downloads are
+    # handed to nginx with X-Accel-Redirect instead of streamed by the app
+    files_accel_redirect_prefix: Optional[str]
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the settings, reading the environment on first use."""
+    return Settings(
+        supabase_url=os.environ.get("SUPABASE_URL"),
+        supabase_key=os.environ.get("SUPABASE_KEY"),
+        postgres_dsn=os.environ.get("POSTGRES_DSN"),
+        postgres_statement_cache_size=int(os.environ.get("POSTGRES_STATEMENT_CACHE_SIZE", "1024")),
+        discovery_cache_threshold=float(os.environ.get("DISCOVERY_CACHE_THRESHOLD", "0.95")),
+        discovery_cache_max_entries=int(os.environ.get("DISCOVERY_CACHE_MAX_ENTRIES", "1024")),
+        files_accel_redirect_prefix=os.environ.get("FILES_ACCEL_REDIRECT_PREFIX")
+    )
@@ -0,0 +1,47 @@
+/*
+  # Atomic Calendar Event Rescheduling
+
+  1. New Functions
+    - `reschedule_calendar_event`: Moves an event to a new time slot and appends
+      the change to `rescheduling_history` in a single UPDATE
+
+  2. Notes
+    - The history entry is concatenated server-side with `||`, so concurrent
+      reschedules can no longer overwrite each other's history
+    - Returns the previous start/end times; an empty result means the event
+      does not exist
+*/
+
+CREATE OR REPLACE FUNCTION reschedule_calendar_event(
+  p_event_id text,
+  p_new_start_time timestamptz,
+  p_new_end_time timestamptz,
+  p_rescheduled_at timestamptz DEFAULT now()
+)
+RETURNS TABLE (old_start_time timestamptz, old_end_time timestamptz)
+LANGUAGE sql
+AS $$
+  UPDATE calendar_events e
+  SET
+    start_time = p_new_start_time,
+    end_time = p_new_end_time,
+    status = 'rescheduled',
+    updated_at = p_rescheduled_at,
+    rescheduling_history = COALESCE(e.rescheduling_history, '[]'::jsonb) || jsonb_build_array(
+      jsonb_build_object(
+        'old_start_time', prev.start_time,
+        'old_end_time', prev.end_time,
+        'new_start_time', p_new_start_time,
+        'new_end_time', p_new_end_time,
+        'rescheduled_at', p_rescheduled_at
+      )
+    )
+  FROM (
+    SELECT id, start_time, end_time
+    FROM calendar_events
+    WHERE id = p_event_id
+    FOR UPDATE
+  ) prev
+  WHERE e.id = prev.id
+  RETURNING prev.start_time, prev.end_time;
+$$;
@@ -0,0 +1,19 @@
+/*
+  # Calendar Event Lookup Indexes
+
+  1. New Indexes
+    - `idx_calendar_events_client_time`: Covers `get_client_events`, which
+      filters by `client_id` and range-scans `start_time`/`end_time`; rows
+      are still read from the table, since the endpoint returns every column
+    - `idx_event_attendees_event`: Supports the per-event attendee lookups
+
+  2. Notes
+    - Migrations run inside a transaction, so the indexes are created without
+      CONCURRENTLY; build them concurrently by hand on large live tables
+*/
+
+CREATE INDEX IF NOT EXISTS idx_calendar_events_client_time
+  ON calendar_events (client_id, start_time, end_time);
+
+CREATE INDEX IF NOT EXISTS idx_event_attendees_event
+  ON event_attendees (event_id);
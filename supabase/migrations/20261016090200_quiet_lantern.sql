@@ -0,0 +1,69 @@
+/*
+  # Meeting Notes Full-Text Search
+
+  1. Changes
+    - `meeting_notes_search_text`: Immutable helper that joins the searchable
+      text columns; `array_to_string` is only stable, so a generated column
+      cannot call it directly
+    - `meeting_notes.search_tsv`: Stored English tsvector over the title,
+      summary, key points, decisions and topics
+    - `idx_meeting_notes_search_tsv`: GIN index on `search_tsv`
+
+  2. New Functions
+    - `search_meeting_notes`: Used by `GET /meeting-notes/search`; matches the
+      query with `websearch_to_tsquery`, applies the optional filters and
+      returns the matching notes as JSON, best `ts_rank` first, with the rank
+      scaled to 0-1 in a `rank` field
+
+  3. Notes
+    - Assumes the list columns are `text[]`
+    - Adding the stored column rewrites the table once
+*/
+
+CREATE OR REPLACE FUNCTION meeting_notes_search_text(
+  title text,
+  summary text,
+  key_points text[],
+  decisions text[],
+  topics_discussed text[]
+) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+  SELECT concat_ws(' ',
+    title,
+    summary,
+    array_to_string(key_points, ' '),
+    array_to_string(decisions, ' '),
+    array_to_string(topics_discussed, ' ')
+  )
+$$;
+
+ALTER TABLE meeting_notes
+  ADD COLUMN IF NOT EXISTS search_tsv tsvector
+  GENERATED ALWAYS AS (
+    to_tsvector('english', meeting_notes_search_text(title, summary, key_points, decisions, topics_discussed))
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_meeting_notes_search_tsv
+  ON meeting_notes USING GIN (search_tsv);
+
+CREATE OR REPLACE FUNCTION search_meeting_notes(
+  q text,
+  p_client_id text DEFAULT NULL,
+  p_project_id text DEFAULT NULL,
+  p_meeting_type text DEFAULT NULL,
+  p_date_from timestamptz DEFAULT NULL,
+  p_date_to timestamptz DEFAULT NULL,
+  p_limit integer DEFAULT 50
+) RETURNS SETOF jsonb
+LANGUAGE sql STABLE AS $$
+  SELECT (to_jsonb(n) - 'search_tsv') || jsonb_build_object('rank', ts_rank(n.search_tsv, query, 32))
+  FROM meeting_notes n, websearch_to_tsquery('english', q) AS query
+  WHERE n.search_tsv @@ query
+    AND (p_client_id IS NULL OR n.client_id::text = p_client_id)
+    AND (p_project_id IS NULL OR n.project_id::text = p_project_id)
+    AND (p_meeting_type IS NULL OR n.meeting_type::text = p_meeting_type)
+    AND (p_date_from IS NULL OR n.date >= p_date_from)
+    AND (p_date_to IS NULL OR n.date <= p_date_to)
+  ORDER BY ts_rank(n.search_tsv, query, 32) DESC
+  LIMIT p_limit
+$$;
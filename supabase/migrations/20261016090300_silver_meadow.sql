@@ -0,0 +1,94 @@
+/*
+  # Meeting Notes Semantic Search
+
+  1. Changes
+    - Enables the `vector` extension
+    - `meeting_notes.embedding`: 1536-dimension embedding of the note's
+      searchable text, written on create and by the backfill endpoint
+    - `idx_meeting_notes_embedding`: HNSW index for cosine distance
+
+  2. New Functions
+    - `match_meeting_notes`: Used by `GET /meeting-notes/search`; returns the
+      notes nearest to a query embedding as JSON, nearest first, with the
+      cosine similarity in a `similarity` field
+    - `set_meeting_note_embeddings`: Writes a batch of `{id, embedding}`
+      pairs in one statement for the backfill
+    - `search_meeting_notes`: Replaced to leave `embedding` out of the
+      returned JSON
+
+  3. Notes
+    - Notes without an embedding are still found by the full-text search
+    - The endpoint merges the two searches by reciprocal rank, as text ranks
+      and similarities are not on the same scale
+*/
+
+CREATE EXTENSION IF NOT EXISTS vector WITH SCHEMA extensions;
+
+ALTER TABLE meeting_notes
+  ADD COLUMN IF NOT EXISTS embedding vector(1536);
+
+CREATE INDEX IF NOT EXISTS idx_meeting_notes_embedding
+  ON meeting_notes USING hnsw (embedding vector_cosine_ops);
+
+CREATE OR REPLACE FUNCTION match_meeting_notes(
+  query_embedding vector(1536),
+  match_count integer DEFAULT 50,
+  min_similarity double precision DEFAULT 0.3,
+  p_client_id text DEFAULT NULL,
+  p_project_id text DEFAULT NULL,
+  p_meeting_type text DEFAULT NULL,
+  p_date_from timestamptz DEFAULT NULL,
+  p_date_to timestamptz DEFAULT NULL
+) RETURNS SETOF jsonb
+LANGUAGE sql STABLE AS $$
+  SELECT (to_jsonb(n) - 'search_tsv' - 'embedding') || jsonb_build_object('similarity', n.similarity)
+  FROM (
+    SELECT m.*, 1 - (m.embedding <=> query_embedding) AS similarity
+    FROM meeting_notes m
+    WHERE m.embedding IS NOT NULL
+      AND (p_client_id IS NULL OR m.client_id::text = p_client_id)
+      AND (p_project_id IS NULL OR m.project_id::text = p_project_id)
+      AND (p_meeting_type IS NULL OR m.meeting_type::text = p_meeting_type)
+      AND (p_date_from IS NULL OR m.date >= p_date_from)
+      AND (p_date_to IS NULL OR m.date <= p_date_to)
+    ORDER BY m.embedding <=> query_embedding
+    LIMIT match_count
+  ) n
+  WHERE n.similarity >= min_similarity
+$$;
+
+CREATE OR REPLACE FUNCTION set_meeting_note_embeddings(items jsonb)
+RETURNS integer
+LANGUAGE sql AS $$
+  WITH updated AS (
+    UPDATE meeting_notes n
+    SET embedding = i.embedding::vector
+    FROM jsonb_to_recordset(items) AS i(id text, embedding text)
+    WHERE n.id::text = i.id
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated
+$$;
+
+-- Text search results must not carry the new embedding column either
+CREATE OR REPLACE FUNCTION search_meeting_notes(
+  q text,
+  p_client_id text DEFAULT NULL,
+  p_project_id text DEFAULT NULL,
+  p_meeting_type text DEFAULT NULL,
+  p_date_from timestamptz DEFAULT NULL,
+  p_date_to timestamptz DEFAULT NULL,
+  p_limit integer DEFAULT 50
+) RETURNS SETOF jsonb
+LANGUAGE sql STABLE AS $$
+  SELECT (to_jsonb(n) - 'search_tsv' - 'embedding') || jsonb_build_object('rank', ts_rank(n.search_tsv, query, 32))
+  FROM meeting_notes n, websearch_to_tsquery('english', q) AS query
+  WHERE n.search_tsv @@ query
+    AND (p_client_id IS NULL OR n.client_id::text = p_client_id)
+    AND (p_project_id IS NULL OR n.project_id::text = p_project_id)
+    AND (p_meeting_type IS NULL OR n.meeting_type::text = p_meeting_type)
+    AND (p_date_from IS NULL OR n.date >= p_date_from)
+    AND (p_date_to IS NULL OR n.date <= p_date_to)
+  ORDER BY ts_rank(n.search_tsv, query, 32) DESC
+  LIMIT p_limit
+$$;
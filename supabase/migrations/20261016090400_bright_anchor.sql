@@ -0,0 +1,33 @@
+/*
+  # Atomic Meeting Notes Creation
+
+  1. New Functions
+    - `create_notes_with_actions`: Used by `POST /meeting-notes`; inserts the
+      meeting notes row and all of its action items in one call, so both
+      land in the same transaction and a failure leaves neither behind
+
+  2. Notes
+    - `embedding` is passed as a JSON array; its text form is valid `vector` input
+    - Columns are listed explicitly because `meeting_notes.search_tsv` is
+      generated and cannot be written
+*/
+
+CREATE OR REPLACE FUNCTION create_notes_with_actions(notes jsonb, action_items jsonb DEFAULT '[]'::jsonb)
+RETURNS void
+LANGUAGE sql AS $$
+  INSERT INTO meeting_notes (
+    id, title, meeting_type, client_id, project_id, date, duration_minutes, attendees,
+    summary, key_points, decisions, topics_discussed, embedding, created_at, updated_at
+  )
+  SELECT
+    id, title, meeting_type, client_id, project_id, date, duration_minutes, attendees,
+    summary, key_points, decisions, topics_discussed, embedding, created_at, updated_at
+  FROM jsonb_populate_record(NULL::meeting_notes, notes);
+
+  INSERT INTO action_items (
+    id, notes_id, description, assigned_to, due_date, status, notes, created_at, updated_at
+  )
+  SELECT
+    id, notes_id, description, assigned_to, due_date, status, notes, created_at, updated_at
+  FROM jsonb_populate_recordset(NULL::action_items, action_items);
+$$;
@@ -0,0 +1,37 @@
+/*
+  # Client Meeting History Page
+
+  1. New Functions
+    - `list_client_meetings`: Used by `GET /meeting-notes/history/{client_id}`;
+      returns one page of a client's meetings as JSON, newest first, with the
+      number of meetings matching the filters in a `total` field on every row
+
+  2. Notes
+    - The total comes from `count(*) OVER ()`, so the page and the count
+      share one scan; a page past the end has no rows to carry it
+*/
+
+CREATE OR REPLACE FUNCTION list_client_meetings(
+  p_client_id text,
+  p_project_id text DEFAULT NULL,
+  p_meeting_type text DEFAULT NULL,
+  p_limit integer DEFAULT 10,
+  p_offset integer DEFAULT 0
+) RETURNS SETOF jsonb
+LANGUAGE sql STABLE AS $$
+  SELECT jsonb_build_object(
+    'id', n.id,
+    'title', n.title,
+    'meeting_type', n.meeting_type,
+    'date', n.date,
+    'summary', n.summary,
+    'total', count(*) OVER ()
+  )
+  FROM meeting_notes n
+  WHERE n.client_id::text = p_client_id
+    AND (p_project_id IS NULL OR n.project_id::text = p_project_id)
+    AND (p_meeting_type IS NULL OR n.meeting_type::text = p_meeting_type)
+  ORDER BY n.date DESC
+  LIMIT p_limit
+  OFFSET p_offset
+$$;
@@ -0,0 +1,11 @@
+/*
+  # Action Item Status Counts
+
+  1. New Indexes
+    - `idx_action_items_notes_id_status`: Covers the per-meeting status counts
+      in `GET /meeting-notes/history/{client_id}`, so they can be answered
+      from the index alone
+*/
+
+CREATE INDEX IF NOT EXISTS idx_action_items_notes_id_status
+  ON action_items (notes_id, status);